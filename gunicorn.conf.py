@@ -0,0 +1,38 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+The application is imported once in the master (``preload_app``) and the URL
+resolver is populated there too, so every view, serializer and model module is
+loaded before workers fork. ``gc.freeze()`` then moves those objects out of the
+collector's reach: without it, the first collection in each worker touches
+every object header and copies the shared pages, undoing copy-on-write.
+"""
+import gc
+import multiprocessing
+import os
+
+pythonpath = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+wsgi_app = 'eventManagementAPI.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 0))
+
+_warmed = False
+
+
+def pre_fork(server, worker):
+    global _warmed
+    if _warmed or not preload_app:
+        return
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # Import urls.py and every view it references now rather than on each worker's first request.
+    get_resolver()._populate()
+    # Connections opened while loading must not be shared with the children.
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
+    _warmed = True
@@ -1,4 +1,4 @@
-from drf_spectacular.utils import extend_schema_view, extend_schema
+from eventManagementAPI.schema import extend_schema_view, extend_schema
 from .serializers import UserRegistrationSerializer, UserLoginSerializer
 from rest_framework import status
 
@@ -29,6 +29,7 @@ user_login_view_schema = extend_schema_view(
             },
             status.HTTP_400_BAD_REQUEST: 'Validation errors',
             status.HTTP_401_UNAUTHORIZED: 'Invalid credentials',
+            status.HTTP_429_TOO_MANY_REQUESTS: 'Too many login attempts',
         }
     )
 )
\ No newline at end of file
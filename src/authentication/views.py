@@ -6,6 +6,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from .serializers import UserRegistrationSerializer, UserLoginSerializer
 from django.http import HttpResponse
+from eventManagementAPI.throttling import LoginRateThrottle, LoginUsernameThrottle
 
 from .schema_extensions import (
     user_registration_view_schema, user_login_view_schema
@@ -31,6 +32,7 @@ class UserRegistrationAPIView(APIView):
 @user_login_view_schema
 class UserLoginAPIView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [LoginRateThrottle, LoginUsernameThrottle]
     serializer_class = UserLoginSerializer
 
     def post(self, request):
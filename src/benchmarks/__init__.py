@@ -0,0 +1,12 @@
+"""
+Local benchmarks for the Event Management API.
+
+Run from ``src/`` with ``python -m benchmarks.<name>``.
+"""
+import os
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'eventManagementAPI.settings')
+    import django
+    django.setup()
@@ -0,0 +1,242 @@
+"""
+Benchmark every API endpoint against synthetic data.
+
+Usage:
+    python -m benchmarks.api [--events 20 --bids 500 ...] [--requests 50] [--output run.json]
+    python -m benchmarks.api --compare baseline.json run.json [--threshold 10]
+
+Requests go through Django's test client in-process, so the numbers cover
+the full middleware/view/serializer/database stack without network noise.
+A throwaway test database is created on the configured backend (SQLite by
+default, PostgreSQL when POSTGRES_DB is set) and seeded with
+``generate_synthetic_data``; the development database is never touched.
+Endpoints answering 202 are timed until their job has run, in-process.
+"""
+import argparse
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlencode
+
+from . import setup_django
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-pct * len(sorted_values) // 100))
+    return sorted_values[rank - 1]
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    total = sum(timings)
+    summary = {f'p{pct}_ms': round(percentile(timings, pct) * 1000, 3) for pct in PERCENTILES}
+    summary.update({
+        'mean_ms': round(total / len(timings) * 1000, 3),
+        'requests': len(timings),
+        'throughput_rps': round(len(timings) / total, 1) if total else None,
+    })
+    return summary
+
+
+def build_scenarios(context):
+    """
+    Return ``(name, method, path, payload)`` tuples. ``path`` and ``payload``
+    may be callables taking the iteration number, for writes that must not
+    collide across iterations.
+    """
+    from events.urls import router
+
+    scenarios = []
+    for prefix, viewset, basename in router.registry:
+        scenarios.append((f'{prefix}.list', 'get', f'/api/{prefix}/', None))
+        pk = context['objects'].get(prefix)
+        if pk is not None:
+            scenarios.append((f'{prefix}.retrieve', 'get', f'/api/{prefix}/{pk}/', None))
+
+    event = context['event']
+    now = datetime.now(timezone.utc)
+    calendar = urlencode({
+        'start': (now - timedelta(days=30)).isoformat(), 'end': (now + timedelta(days=60)).isoformat(), 'bucket': 'day',
+    })
+    scenarios += [
+        ('events.search', 'get', '/api/events/?q=paper', None),
+        ('events.active_at', 'get', f'/api/events/?{urlencode({"active_at": now.isoformat()})}', None),
+        ('events.calendar', 'get', f'/api/events/calendar/?{calendar}', None),
+        ('events.changes', 'get', f'/api/events/{event}/changes/?since=0', None),
+        ('events.export', 'post', f'/api/events/{event}/export/', None),
+        ('bids.create', 'post', '/api/bids/',
+         lambda n: {'event': event, 'participant': context['participant'], 'amount': f'{1000 + n}.00'}),
+    ]
+    for transition in ('publish', 'pause', 'resume', 'lock', 'unlock'):
+        scenarios.append((f'events.{transition}', 'post', f'/api/events/{event}/{transition}/', None))
+    return scenarios
+
+
+def run_scenario(client, method, path, payload, requests, warmup):
+    timings = []
+    for n in range(warmup + requests):
+        url = path(n) if callable(path) else path
+        data = payload(n) if callable(payload) else payload
+        started = time.perf_counter()
+        response = getattr(client, method)(url, data, format='json') if data else getattr(client, method)(url)
+        if response.status_code == 202 and response.has_header('Location'):
+            response = finish_job(client, response['Location'])
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 400:
+            raise RuntimeError(f'{method.upper()} {url} returned {response.status_code}')
+        if n >= warmup:
+            timings.append(elapsed)
+    return timings
+
+
+def finish_job(client, location):
+    """Run the queued work of a 202 response in-process so its time is measured, not just the enqueue."""
+    from events.jobs import run_worker
+    from events.models import Job
+
+    run_worker(processes=0, burst=True)
+    response = client.get(location)
+    if response.status_code < 400 and response.data['status'] != Job.SUCCEEDED:
+        raise RuntimeError(f"{location} finished {response.data['status']}: {response.data['error']}")
+    return response
+
+
+def benchmark(args, stream=sys.stderr):
+    """
+    Seed the current database and time every scenario. Returns
+    ``(seed_seconds, results)``.
+    """
+    from django.core.management import call_command
+    from rest_framework.test import APIClient
+
+    from events.models import Event, Participant
+    from events.urls import router
+
+    started = time.perf_counter()
+    call_command(
+        'generate_synthetic_data', events=args.events, items=args.items, participants=args.participants,
+        bids=args.bids, logs=args.logs, seed=args.seed, stdout=io.StringIO(),
+    )
+    seed_seconds = time.perf_counter() - started
+
+    event = Event.objects.order_by('pk').first()
+    context = {
+        'event': event.pk,
+        'participant': Participant.objects.filter(event=event).order_by('pk').values_list('pk', flat=True).first(),
+        'objects': {
+            prefix: viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+            for prefix, viewset, _ in router.registry
+        },
+    }
+    client = APIClient()
+    client.force_authenticate(event.owner)
+
+    results = {}
+    for name, method, path, payload in build_scenarios(context):
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        results[name] = summarize(run_scenario(client, method, path, payload, args.requests, args.warmup))
+        print(f"{name:<24}{results[name]['p50_ms']:>10}{results[name]['p95_ms']:>10}"
+              f"{results[name]['p99_ms']:>10}{results[name]['throughput_rps']:>10}", file=stream)
+    return seed_seconds, results
+
+
+def run(args):
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    settings.PERFORMANCE_MONITORING = {**settings.PERFORMANCE_MONITORING, 'PROFILE_SAMPLE_RATE': 0}
+    settings.ALLOWED_HOSTS = ['*']
+    # Measure the endpoints, not the rate limiter: a single client hammers them.
+    override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': dict.fromkeys(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']),
+    }).enable()
+    test_database = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed_seconds, results = benchmark(args)
+    finally:
+        connection.creation.destroy_test_db(test_database, verbosity=0)
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'seed_seconds': round(seed_seconds, 3),
+            'data': {key: getattr(args, key) for key in ('events', 'items', 'participants', 'bids', 'logs', 'seed')},
+            'requests': args.requests,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline_path, current_path, threshold):
+    """Print per-scenario deltas and return the scenarios whose p95 regressed by more than ``threshold`` percent."""
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)['results']
+    with open(current_path) as handle:
+        current = json.load(handle)['results']
+
+    regressions = []
+    print(f"{'scenario':<24}{'p95 before':>12}{'p95 after':>12}{'change':>10}")
+    for name in sorted(set(baseline) & set(current)):
+        before, after = baseline[name]['p95_ms'], current[name]['p95_ms']
+        change = (after - before) / before * 100 if before else 0.0
+        flag = ''
+        if change > threshold:
+            regressions.append(name)
+            flag = '  REGRESSION'
+        print(f'{name:<24}{before:>12}{after:>12}{change:>+9.1f}%{flag}')
+    for name in sorted(set(baseline) ^ set(current)):
+        print(f"{name:<24}{'only in ' + ('baseline' if name in baseline else 'current'):>34}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=20)
+    parser.add_argument('--items', type=int, default=50)
+    parser.add_argument('--participants', type=int, default=20)
+    parser.add_argument('--bids', type=int, default=500)
+    parser.add_argument('--logs', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--requests', type=int, default=50, help='Measured requests per scenario.')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured requests per scenario.')
+    parser.add_argument('--only', nargs='*', help='Only run scenarios whose name starts with one of these.')
+    parser.add_argument('--output', help='Write results as JSON to this file.')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'),
+                        help='Compare two result files instead of running.')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Percent p95 increase reported as a regression (default 10).')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        regressions = compare(*args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} scenario(s) regressed by more than {args.threshold}%.")
+            sys.exit(1)
+        return
+
+    print(f"{'scenario':<24}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}", file=sys.stderr)
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            handle.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Compare DRF's stock JSONRenderer with the orjson and MessagePack renderers.
+
+Usage: python -m benchmarks.renderers [--bids 5000] [--repeat 20]
+
+The payload mirrors an ``EventSerializer`` response: nested items,
+participants, bids and logs. Two variants are measured: the serializer output
+(Decimals and datetimes already coerced to strings) and raw rows as returned
+by ``.values()``, which still carry ``Decimal`` and ``datetime`` objects.
+"""
+import argparse
+import datetime
+import decimal
+import json
+import random
+import statistics
+import time
+
+from . import setup_django
+
+
+def build_event_payload(items=200, participants=100, bids=5000, logs=1000, raw=False, seed=1):
+    rng = random.Random(seed)
+    start = datetime.datetime(2024, 6, 1, 9, 0, tzinfo=datetime.timezone.utc)
+
+    def when(offset):
+        value = start + datetime.timedelta(seconds=offset, microseconds=rng.randrange(10 ** 6))
+        return value if raw else value.isoformat().replace('+00:00', 'Z')
+
+    def money(value):
+        value = decimal.Decimal(value).quantize(decimal.Decimal('0.01'))
+        return value if raw else str(value)
+
+    return {
+        'id': 1,
+        'name': 'Quarterly supplies auction',
+        'description': 'Reverse auction for office supplies — Q3 «lots»',
+        'start_time': when(0),
+        'end_time': when(86400),
+        'owner': 1,
+        'status': 'published',
+        'approval_for_publish': True,
+        'items': [
+            {'id': i, 'event': 1, 'name': f'Item {i}', 'description': 'Box of A4 paper, 80gsm',
+             'quantity': rng.randrange(1, 500), 'currency': 'USD'}
+            for i in range(items)
+        ],
+        'participants': [
+            {'id': i, 'event': 1, 'name': f'Supplier {i}', 'contact_info': f'supplier{i}@example.com',
+             'blocked': False}
+            for i in range(participants)
+        ],
+        'bids': [
+            {'id': i, 'event': 1, 'participant': rng.randrange(participants),
+             'amount': money(rng.uniform(1, 99999)), 'timestamp': when(i), 'is_alternative': rng.random() < 0.1}
+            for i in range(bids)
+        ],
+        'scenarios': [],
+        'attachments': [],
+        'rules': [],
+        'logs': [
+            {'id': i, 'event': 1, 'message': f'Bid {i} accepted', 'timestamp': when(i)}
+            for i in range(logs)
+        ],
+        'bid_count': bids,
+        'participant_count': participants,
+        'item_count': items,
+    }
+
+
+def measure(render, data, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(render(data))
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bids', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+    args = parser.parse_args(argv)
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from eventManagementAPI.renderers import MessagePackRenderer, ORJSONRenderer, msgpack, orjson
+
+    renderers = {'drf-json': JSONRenderer()}
+    if orjson is not None:
+        renderers['orjson'] = ORJSONRenderer()
+    if msgpack is not None:
+        renderers['msgpack'] = MessagePackRenderer()
+
+    results = []
+    for variant, raw in (('serialized', False), ('raw-values', True)):
+        data = build_event_payload(bids=args.bids, raw=raw)
+        baseline = None
+        for name, renderer in renderers.items():
+            seconds, size = measure(renderer.render, data, args.repeat)
+            baseline = baseline or seconds
+            results.append({
+                'payload': variant, 'renderer': name, 'median_ms': round(seconds * 1000, 3),
+                'bytes': size, 'speedup': round(baseline / seconds, 2),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'payload':<12}{'renderer':<10}{'median ms':>12}{'bytes':>12}{'speedup':>9}")
+    for row in results:
+        print(f"{row['payload']:<12}{row['renderer']:<10}{row['median_ms']:>12}{row['bytes']:>12}{row['speedup']:>8}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Content codecs for ``CompressionMiddleware``.
+
+gzip is always available; ``br`` and ``zstd`` are offered when the optional
+``brotli`` and ``zstandard`` packages are installed. Each codec is a factory
+returning ``(process, flush, finish)``: ``process`` feeds data, ``flush``
+emits everything fed so far as a decodable block (used between chunks of a
+streaming response) and ``finish`` ends the stream.
+"""
+import zlib
+
+from django.utils.http import parse_etags
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/xml', 'application/javascript', 'application/yaml',
+    'application/vnd.oai.openapi', 'application/msgpack', 'application/x-msgpack',
+)
+
+
+def _gzip(level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+def _brotli(level):
+    compressor = brotli.Compressor(quality=level)
+    return compressor.process, compressor.flush, compressor.finish
+
+
+def _zstd(level):
+    compressor = zstandard.ZstdCompressor(level=level).compressobj()
+    return compressor.compress, lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK), compressor.flush
+
+
+CODECS = {'gzip': _gzip}
+if brotli is not None:
+    CODECS['br'] = _brotli
+if zstandard is not None:
+    CODECS['zstd'] = _zstd
+
+
+def is_compressible(content_type):
+    content_type = content_type.split(';')[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith('+json')
+
+
+def etag_matches(if_none_match, etag):
+    """
+    Whether an ``If-None-Match`` header lists ``etag`` (or is ``*``). The
+    comparison is weak, so the ``W/`` form ``CompressionMiddleware`` sends for
+    encoded responses matches the strong tag it was derived from.
+    """
+    etags = parse_etags(if_none_match or '')
+    return '*' in etags or etag.removeprefix('W/') in {tag.removeprefix('W/') for tag in etags}
+
+
+def negotiate(accept_encoding, preference):
+    """
+    The encoding to answer an ``Accept-Encoding`` header with: the one the
+    client weights highest, ties going to the earliest in ``preference``.
+    Returns None for identity.
+    """
+    weights = {}
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            weights[name.strip()] = weight
+    default = weights.get('*', 0.0)
+    candidates = [
+        (weights.get(name, default), -rank, name)
+        for rank, name in enumerate(preference) if name in CODECS
+    ]
+    weight, _, name = max(candidates, default=(0.0, 0, None))
+    return name if weight > 0 else None
+
+
+def compress(encoding, data, level):
+    process, _, finish = CODECS[encoding](level)
+    return process(data) + finish()
+
+
+def compress_stream(encoding, chunks, level):
+    """Compress an iterable of chunks, yielding one decodable block per non-empty chunk."""
+    process, flush, finish = CODECS[encoding](level)
+    for chunk in chunks:
+        if chunk:
+            yield process(chunk) + flush()
+    yield finish()
+
+
+async def compress_async_stream(encoding, chunks, level):
+    process, flush, finish = CODECS[encoding](level)
+    async for chunk in chunks:
+        if chunk:
+            yield process(chunk) + flush()
+    yield finish()
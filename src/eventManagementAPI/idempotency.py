@@ -0,0 +1,126 @@
+"""
+``Idempotency-Key`` support for POST endpoints.
+
+The first POST with a given key (per user) runs normally and its response is
+kept in the cache for ``IDEMPOTENCY['TTL']`` seconds once the request's
+transaction commits (client errors are kept immediately); retries get that response back, with an
+``Idempotent-Replayed: true`` header, without running the view. While the
+first request is still running, duplicates get 409 straight away with a
+``Retry-After`` of ``IDEMPOTENCY['RETRY_AFTER']`` seconds rather than holding
+a worker and a concurrency slot while they wait.
+Reusing a key with a different body is rejected with 422.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still being processed.'
+    default_code = 'idempotency_conflict'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF's exception handler turns ``wait`` into a Retry-After header.
+        self.wait = wait
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used for a different request.'
+    default_code = 'idempotency_key_reused'
+
+
+class Replay(Exception):
+    """Raised from ``initial`` to short-circuit the view with a stored response."""
+
+    def __init__(self, stored):
+        self.stored = stored
+
+
+def _cache():
+    return caches[settings.IDEMPOTENCY.get('CACHE', 'default')]
+
+
+def _fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f'{request.method} {request.path} {body}'.encode()).hexdigest()
+
+
+class IdempotencyMixin:
+    """Mix into a viewset before the DRF base class to honour ``Idempotency-Key`` on POST."""
+
+    def initial(self, request, *args, **kwargs):
+        self._idempotency = None
+        super().initial(request, *args, **kwargs)
+        key = request.headers.get(HEADER)
+        if request.method != 'POST' or not key:
+            return
+        if len(key) > 255:
+            raise IdempotencyKeyReused(f'{HEADER} must be at most 255 characters.')
+
+        config = settings.IDEMPOTENCY
+        cache = _cache()
+        cache_key = 'idempotency:{}:{}'.format(request.user.pk, hashlib.sha256(key.encode()).hexdigest())
+        fingerprint = _fingerprint(request)
+        stored = cache.get(cache_key)
+        if stored is not None:
+            if stored['fingerprint'] != fingerprint:
+                raise IdempotencyKeyReused()
+            raise Replay(stored)
+        if not cache.add(cache_key + ':lock', 1, config['LOCK_TIMEOUT']):
+            raise IdempotencyConflict(wait=config['RETRY_AFTER'])
+        self._idempotency = (cache_key, fingerprint)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, Replay):
+            stored = exc.stored
+            response = Response(stored['data'], status=stored['status'], headers=stored['headers'])
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        claim, self._idempotency = getattr(self, '_idempotency', None), None
+        handed_off = claim is None
+        try:
+            response = super().finalize_response(request, response, *args, **kwargs)
+            if claim is None:
+                return response
+            cache_key, fingerprint = claim
+            rolling_back = transaction.get_connection().needs_rollback
+            if response.status_code >= 500 or (rolling_back and response.status_code < 400):
+                return response
+            stored = {
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'data': response.data,
+                'headers': {name: response[name] for name in ('Location', 'Retry-After') if response.has_header(name)},
+            }
+            if response.status_code >= 400:
+                # Client errors write nothing, and the rollback DRF marks for them
+                # would discard an on_commit callback, so store them right away.
+                _store(cache_key, stored)
+            else:
+                # Only publish the response once the writes it reports are committed.
+                transaction.on_commit(lambda: _store(cache_key, stored))
+            handed_off = True
+            return response
+        finally:
+            if not handed_off:
+                _cache().delete(claim[0] + ':lock')
+
+
+def _store(cache_key, stored):
+    cache = _cache()
+    cache.set(cache_key, stored, settings.IDEMPOTENCY['TTL'])
+    cache.delete(cache_key + ':lock')
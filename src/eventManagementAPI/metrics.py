@@ -0,0 +1,151 @@
+"""
+In-process request metrics exposed in the Prometheus text format.
+
+``PerformanceMiddleware`` records one observation per request; ``metrics_view``
+renders the registry for scraping. Each gunicorn worker keeps its own
+registry, so scrape workers individually or aggregate by instance.
+"""
+import hmac
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Cache hits/misses of the request being handled, for the Server-Timing header.
+request_cache_stats = ContextVar('request_cache_stats', default=None)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket', {**labels, 'le': repr(float(bound))}, cumulative
+        yield f'{name}_bucket', {**labels, 'le': '+Inf'}, self.count
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, self.count
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = {}
+        self.latency = {}
+        self.queries = {}
+        self.query_seconds = {}
+        self.response_bytes = {}
+        self.cache = {}
+
+    def observe_request(self, view, method, status, seconds, query_count, query_seconds, size):
+        with self.lock:
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            labels = (view, method)
+            self.latency.setdefault(labels, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.queries.setdefault(labels, Histogram(QUERY_COUNT_BUCKETS)).observe(query_count)
+            self.query_seconds[labels] = self.query_seconds.get(labels, 0) + query_seconds
+            if size is not None:
+                self.response_bytes.setdefault(labels, Histogram(SIZE_BUCKETS)).observe(size)
+
+    def observe_cache(self, name, hit):
+        with self.lock:
+            key = (name, 'hit' if hit else 'miss')
+            self.cache[key] = self.cache.get(key, 0) + 1
+
+    def render(self):
+        with self.lock:
+            families = [
+                ('http_requests_total', 'counter', 'Requests handled, by view, method and status.',
+                 [(None, {'view': v, 'method': m, 'status': s}, n) for (v, m, s), n in self.requests.items()]),
+                ('http_request_duration_seconds', 'histogram', 'Time spent handling requests.',
+                 self._histogram_samples(self.latency, 'http_request_duration_seconds')),
+                ('http_request_db_queries', 'histogram', 'SQL queries executed per request.',
+                 self._histogram_samples(self.queries, 'http_request_db_queries')),
+                ('http_request_db_seconds_total', 'counter', 'Time spent in SQL queries.',
+                 [(None, {'view': v, 'method': m}, n) for (v, m), n in self.query_seconds.items()]),
+                ('http_response_size_bytes', 'histogram', 'Size of non-streaming response bodies.',
+                 self._histogram_samples(self.response_bytes, 'http_response_size_bytes')),
+                ('cache_requests_total', 'counter', 'Application cache lookups, by cache and result.',
+                 [(None, {'cache': c, 'result': r}, n) for (c, r), n in self.cache.items()]),
+            ]
+        lines = []
+        for name, kind, help_text, samples in families:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples:
+                lines.append(f'{sample_name or name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _histogram_samples(histograms, name):
+        return [
+            sample
+            for (view, method), histogram in histograms.items()
+            for sample in histogram.samples(name, {'view': view, 'method': method})
+        ]
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+
+def record_cache(name, hit):
+    """Count a cache lookup; call this wherever the application reads a cache."""
+    registry.observe_cache(name, hit)
+    stats = request_cache_stats.get()
+    if stats is not None:
+        stats['hits' if hit else 'misses'] += 1
+
+
+def metrics_allowed(request):
+    """Staff users, or scrapers sending the configured ``METRICS_TOKEN`` as a bearer token."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    token = settings.PERFORMANCE_MONITORING.get('METRICS_TOKEN')
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode())
+
+
+def metrics_view(request):
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,278 @@
+import cProfile
+import hashlib
+import heapq
+import logging
+import math
+import os
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from . import compression
+from .metrics import record_cache, registry, request_cache_stats
+from .throttling import blocked_for
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_STATEMENT_RE = re.compile(r'^\s*(BEGIN|COMMIT|ROLLBACK|SAVEPOINT|RELEASE)\b', re.IGNORECASE)
+
+
+def is_transaction_statement(sql):
+    """Transaction control depends on atomic saves and test wrapping, not on the view's queries."""
+    return bool(TRANSACTION_STATEMENT_RE.match(sql))
+
+
+def query_budget_for(request):
+    """The ``query_budget`` a DRF viewset declares for the action serving this request."""
+    match = request.resolver_match
+    view_class = getattr(match.func, 'cls', None) if match else None
+    actions = getattr(match.func, 'actions', None) if match else None
+    budgets = getattr(view_class, 'query_budget', None)
+    if not budgets or not actions:
+        return None, None
+    action = actions.get(request.method.lower())
+    return f'{view_class.__name__}.{action}', budgets.get(action)
+
+
+class QueryTimer:
+    """``execute_wrapper`` that counts and times the SQL run during a request."""
+
+    def __init__(self):
+        self.count = 0
+        self.budgeted = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            if not is_transaction_statement(sql):
+                self.budgeted += 1
+
+
+class SlowestProfiles:
+    """Keep profiler output on disk for the slowest ``limit`` sampled requests."""
+
+    def __init__(self, directory, limit):
+        self.directory = directory
+        self.limit = limit
+        self.heap = []
+        self.lock = threading.Lock()
+
+    def qualifies(self, seconds):
+        with self.lock:
+            return len(self.heap) < self.limit or seconds > self.heap[0][0]
+
+    def keep(self, seconds, view, write):
+        os.makedirs(self.directory, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%dT%H%M%S%f')
+        path = os.path.join(self.directory, f'{seconds * 1000:09.1f}ms-{view}-{stamp}')
+        with self.lock:
+            if len(self.heap) >= self.limit and seconds <= self.heap[0][0]:
+                return None
+            path = write(path)
+            if len(self.heap) >= self.limit:
+                _, evicted = heapq.heappushpop(self.heap, (seconds, path))
+                if os.path.exists(evicted):
+                    os.remove(evicted)
+            else:
+                heapq.heappush(self.heap, (seconds, path))
+        return path
+
+
+def _start_profiler(kind):
+    if kind == 'pyinstrument':
+        from pyinstrument import Profiler
+        profiler = Profiler()
+        profiler.start()
+        return profiler
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _stop_profiler(profiler):
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+
+        def write(path):
+            profiler.dump_stats(path + '.prof')
+            return path + '.prof'
+    else:
+        profiler.stop()
+
+        def write(path):
+            with open(path + '.html', 'w') as output:
+                output.write(profiler.output_html())
+            return path + '.html'
+    return write
+
+
+class PerformanceMiddleware:
+    """
+    Record per-view latency, SQL query count and time, response size and cache
+    hits, optionally add a ``Server-Timing`` header, sample cProfile or
+    pyinstrument output for the slowest requests, and log requests that run
+    more queries than their viewset's ``query_budget`` allows.
+
+    Configured through ``settings.PERFORMANCE_MONITORING``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.PERFORMANCE_MONITORING
+        self.server_timing = config.get('SERVER_TIMING', False)
+        self.sample_rate = config.get('PROFILE_SAMPLE_RATE', 0.0)
+        self.profiler = config.get('PROFILER', 'cprofile')
+        self.profiles = SlowestProfiles(config.get('PROFILE_DIR', 'profiles'), config.get('PROFILE_SLOWEST', 20))
+        self.check_budgets = config.get('LOG_QUERY_BUDGET_BREACHES', False)
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        cache_stats = {'hits': 0, 'misses': 0}
+        token = request_cache_stats.set(cache_stats)
+        profiler = None
+        if self.sample_rate and random.random() < self.sample_rate:
+            profiler = _start_profiler(self.profiler)
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timer))
+                response = self.get_response(request)
+        finally:
+            elapsed = time.perf_counter() - started
+            request_cache_stats.reset(token)
+            write_profile = _stop_profiler(profiler) if profiler is not None else None
+
+        match = request.resolver_match
+        view = (match.view_name or match.route) if match else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.observe_request(view, request.method, response.status_code, elapsed, timer.count, timer.seconds, size)
+
+        if self.check_budgets:
+            label, budget = query_budget_for(request)
+            if budget is not None and timer.budgeted > budget:
+                logger.warning(
+                    'Query budget exceeded: %s ran %d queries (budget %d) for %s',
+                    label, timer.budgeted, budget, request.get_full_path(),
+                )
+
+        if write_profile is not None and self.profiles.qualifies(elapsed):
+            self.profiles.keep(elapsed, view.replace(':', '_'), write_profile)
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join((
+                f'app;dur={elapsed * 1000:.1f}',
+                f'db;dur={timer.seconds * 1000:.1f};desc="{timer.count} queries"',
+                f'cache;desc="{cache_stats["hits"]} hits, {cache_stats["misses"]} misses"',
+            ))
+        return response
+
+
+class FastRejectMiddleware:
+    """
+    Answer 429 straight away to clients a throttle has just blocked for this
+    method and path, before authentication, body parsing or the view run.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            wait = blocked_for(request)
+            if wait is not None:
+                response = JsonResponse(
+                    {'detail': f'Request was throttled. Expected available in {math.ceil(wait)} seconds.'},
+                    status=429,
+                )
+                response['Retry-After'] = str(math.ceil(wait))
+                return response
+        return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best of ``COMPRESSION['ENCODINGS']`` the
+    client accepts. Streaming responses are compressed chunk by chunk, each
+    chunk flushed so clients can decode it as it arrives. Bodies smaller
+    than ``MIN_SIZE``, non-text types and responses that already carry a
+    ``Content-Encoding`` are left alone.
+
+    Compressed bodies of at least ``CACHE_MIN_SIZE`` bytes are kept in the
+    cache under a hash of the uncompressed body, so repeated reads of the same
+    large payload (a popular event, the schema) only pay for hashing it.
+
+    Configured through ``settings.COMPRESSION``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.COMPRESSION
+        self.encodings = config['ENCODINGS']
+        self.levels = config['LEVELS']
+        self.min_size = config['MIN_SIZE']
+        self.cache = caches[config['CACHE']] if config.get('CACHE') else None
+        self.cache_min_size = config['CACHE_MIN_SIZE']
+        self.cache_ttl = config['CACHE_TTL']
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or not compression.is_compressible(response.get('Content-Type', '')):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(request.headers.get('Accept-Encoding', ''), self.encodings)
+        if encoding is None:
+            return response
+        level = self.levels[encoding]
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.compress_async_stream(
+                    encoding, response.streaming_content, level,
+                )
+            else:
+                response.streaming_content = compression.compress_stream(encoding, response.streaming_content, level)
+            del response['Content-Length']
+        else:
+            body = self.compressed(encoding, response.content, level)
+            if len(body) >= len(response.content):
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The compressed bytes differ from the identity representation.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compressed(self, encoding, content, level):
+        if self.cache is None or len(content) < self.cache_min_size:
+            return compression.compress(encoding, content, level)
+        key = 'compressed:{}:{}:{}'.format(encoding, level, hashlib.blake2b(content, digest_size=20).hexdigest())
+        body = self.cache.get(key)
+        record_cache('compressed_response', body is not None)
+        if body is None:
+            body = compression.compress(encoding, content, level)
+            self.cache.set(key, body, self.cache_ttl)
+        return body
+
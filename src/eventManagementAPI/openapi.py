@@ -0,0 +1,11 @@
+from drf_spectacular.generators import SchemaGenerator as SpectacularSchemaGenerator
+
+from .schema import apply_pending_schemas
+
+
+class SchemaGenerator(SpectacularSchemaGenerator):
+    """Applies the lazily recorded schema annotations before generating."""
+
+    def get_schema(self, request=None, public=False):
+        apply_pending_schemas()
+        return super().get_schema(request=request, public=public)
@@ -0,0 +1,197 @@
+"""
+Lazy OpenAPI annotations and the prebuilt schema file.
+
+``extend_schema`` and ``extend_schema_view`` mirror the drf-spectacular
+decorators of the same name but only record their arguments. The real
+decorators are applied by ``apply_pending_schemas`` the first time a schema is
+generated, so API workers import nothing of drf-spectacular beyond its app
+config unless the docs are requested.
+
+``build_schema_files`` (run by ``manage.py build_openapi_schema``) writes the
+schema once per API version; ``schema_file_view`` serves those bytes from
+memory with an ETag and a precompressed gzip variant.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_safe
+
+from .compression import etag_matches, negotiate
+
+logger = logging.getLogger(__name__)
+
+_pending = []
+_lock = threading.Lock()
+
+
+def extend_schema(**kwargs):
+    def decorator(target):
+        with _lock:
+            _pending.append((target, None, kwargs))
+        return target
+    decorator.schema_kwargs = kwargs
+    return decorator
+
+
+def extend_schema_view(**kwargs):
+    def decorator(view):
+        with _lock:
+            _pending.append((view, kwargs, None))
+        return view
+    return decorator
+
+
+def apply_pending_schemas():
+    """Apply every recorded annotation with the real drf-spectacular decorators."""
+    from drf_spectacular import utils
+    from drf_spectacular.openapi import AutoSchema
+    from rest_framework.settings import api_settings
+
+    # REST_FRAMEWORK leaves DEFAULT_SCHEMA_CLASS at DRF's default: the router
+    # resolves APIView.schema for every viewset, which would otherwise import
+    # drf-spectacular in every worker. Only the process generating the schema
+    # switches to spectacular's AutoSchema.
+    api_settings.DEFAULT_SCHEMA_CLASS = AutoSchema
+    with _lock:
+        while _pending:
+            target, view_kwargs, kwargs = _pending.pop(0)
+            if view_kwargs is None:
+                utils.extend_schema(**kwargs)(target)
+            else:
+                utils.extend_schema_view(**{
+                    name: utils.extend_schema(**decorator.schema_kwargs) for name, decorator in view_kwargs.items()
+                })(target)
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """A view that imports ``dotted_path`` and calls ``as_view(**initkwargs)`` on first use."""
+    view = None
+
+    @csrf_exempt
+    def dispatch(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+    return dispatch
+
+
+SCHEMA_FORMATS = {
+    'yaml': 'application/vnd.oai.openapi',
+    'json': 'application/vnd.oai.openapi+json',
+}
+
+
+def schema_path(fmt):
+    version = settings.SPECTACULAR_SETTINGS.get('VERSION') or 'unversioned'
+    return Path(settings.OPENAPI_SCHEMA_DIR) / f'schema-{version}.{fmt}'
+
+
+def _write(path, body):
+    # Write next to the target and rename, so a serving worker never reads a partial file.
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_bytes(body)
+    os.replace(temporary, path)
+
+
+def build_schema_files():
+    """Generate the schema and write every format, plain and gzipped. Returns the written paths."""
+    from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    schema = spectacular_settings.DEFAULT_GENERATOR_CLASS().get_schema(request=None, public=True)
+    renderers = {'yaml': OpenApiYamlRenderer, 'json': OpenApiJsonRenderer}
+    paths = []
+    for fmt in SCHEMA_FORMATS:
+        body = renderers[fmt]().render(schema, renderer_context={})
+        path = schema_path(fmt)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _write(path, body)
+        gzipped = path.with_name(path.name + '.gz')
+        _write(gzipped, gzip.compress(body, mtime=0))
+        paths += [path, gzipped]
+    return paths
+
+
+def source_mtime():
+    """Newest modification time of the project's Python files; used to rebuild the schema in DEBUG."""
+    newest = 0.0
+    for root, dirs, files in os.walk(settings.BASE_DIR):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('__pycache__', 'media', 'profiles')]
+        for name in files:
+            if name.endswith('.py'):
+                newest = max(newest, os.stat(os.path.join(root, name)).st_mtime)
+    return newest
+
+
+class SchemaFile:
+    __slots__ = ('body', 'gzipped', 'etag', 'mtime')
+
+    def __init__(self, path):
+        self.body = path.read_bytes()
+        gzipped = path.with_name(path.name + '.gz')
+        self.gzipped = gzipped.read_bytes() if gzipped.exists() else gzip.compress(self.body, mtime=0)
+        self.etag = '"%s"' % hashlib.sha256(self.body).hexdigest()[:32]
+        self.mtime = path.stat().st_mtime
+
+
+_schema_files = {}
+_schema_lock = threading.Lock()
+
+
+def load_schema_file(fmt):
+    """
+    The schema for ``fmt``, read once per process. A missing file is built on
+    the spot (and a warning logged, since the build belongs in deployment); in
+    DEBUG it is also rebuilt whenever a Python file is newer than it.
+    """
+    schema_file = _schema_files.get(fmt)
+    if schema_file is not None and not settings.DEBUG:
+        return schema_file
+    with _schema_lock:
+        path = schema_path(fmt)
+        stale = not path.exists() or (settings.DEBUG and source_mtime() > path.stat().st_mtime)
+        if stale:
+            if not settings.DEBUG:
+                logger.warning('%s is missing; run manage.py build_openapi_schema during deployment.', path)
+            build_schema_files()
+            _schema_files.clear()
+        schema_file = _schema_files.get(fmt)
+        if schema_file is None:
+            schema_file = _schema_files[fmt] = SchemaFile(path)
+        return schema_file
+
+
+def _requested_format(request):
+    fmt = request.GET.get('format')
+    if fmt in SCHEMA_FORMATS:
+        return fmt
+    return 'json' if 'json' in request.headers.get('Accept', '') else 'yaml'
+
+
+@csrf_exempt
+@require_safe
+def schema_file_view(request):
+    """Serve the prebuilt schema; ``?format=json`` or a JSON ``Accept`` header selects JSON over YAML."""
+    fmt = _requested_format(request)
+    schema_file = load_schema_file(fmt)
+    if etag_matches(request.headers.get('If-None-Match'), schema_file.etag):
+        response = HttpResponseNotModified()
+    elif negotiate(request.headers.get('Accept-Encoding', ''), ['gzip']):
+        response = HttpResponse(schema_file.gzipped, content_type=SCHEMA_FORMATS[fmt])
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(schema_file.body, content_type=SCHEMA_FORMATS[fmt])
+    response['ETag'] = schema_file.etag
+    response['Cache-Control'] = 'public, no-cache'
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
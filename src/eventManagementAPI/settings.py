@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "eventManagementAPI.middleware.PerformanceMiddleware",
+    "eventManagementAPI.middleware.FastRejectMiddleware",
+    "eventManagementAPI.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,6 +90,18 @@ DATABASES = {
     }
 }
 
+# Set POSTGRES_DB (and optionally POSTGRES_USER/PASSWORD/HOST/PORT) to use a
+# PostgreSQL database instead of SQLite.
+if os.environ.get("POSTGRES_DB"):
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ["POSTGRES_DB"],
+        "USER": os.environ.get("POSTGRES_USER", ""),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+        "HOST": os.environ.get("POSTGRES_HOST", ""),
+        "PORT": os.environ.get("POSTGRES_PORT", ""),
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -120,7 +136,6 @@ USE_TZ = True
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.0/howto/static-files/
-import os 
 STATIC_URL = "static/"
 
 MEDIA_URL = '/media/'
@@ -139,15 +154,67 @@ REST_FRAMEWORK = {
      'DEFAULT_PERMISSION_CLASSES': [
          'rest_framework.permissions.IsAuthenticated',
      ],
-     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+     'DEFAULT_RENDERER_CLASSES': [
+         'eventManagementAPI.renderers.ORJSONRenderer',
+         'rest_framework.renderers.BrowsableAPIRenderer',
+     ],
+     'DEFAULT_PARSER_CLASSES': [
+         'eventManagementAPI.parsers.ORJSONParser',
+         'rest_framework.parsers.FormParser',
+         'rest_framework.parsers.MultiPartParser',
+     ],
+     # Token buckets, see eventManagementAPI.throttling. None disables a scope.
+     'DEFAULT_THROTTLE_RATES': {
+         'login': os.environ.get('THROTTLE_LOGIN', '10/min'),
+         'login_username': os.environ.get('THROTTLE_LOGIN_USERNAME', '5/min'),
+         'bid_user': os.environ.get('THROTTLE_BID_USER', '120/min'),
+         'bid_event': os.environ.get('THROTTLE_BID_EVENT', '1200/min'),
+     },
+     # Proxies in front of the app whose X-Forwarded-For entries are trusted when
+     # throttles identify a client. Render runs one; direct deployments trust none.
+     'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1 if os.environ.get('RENDER') else 0)),
  }
 
+# Requests one user may have in flight on BidViewSet writes at once.
+BID_CONCURRENCY_LIMIT = 4
+
+# Shared cache for throttling and the other application caches. Local memory is
+# per process; set REDIS_URL to share state across workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+if os.environ.get('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['REDIS_URL'],
+    }
+RATE_LIMIT_CACHE = 'default'
+
+# Responses to POSTs carrying an Idempotency-Key are replayed for TTL seconds.
+# Duplicates arriving while the first is running get 409, retrying after RETRY_AFTER seconds.
+IDEMPOTENCY = {
+    'CACHE': 'default',
+    'TTL': 24 * 3600,
+    'LOCK_TIMEOUT': 60,
+    'RETRY_AFTER': 1,
+}
+
+# MessagePack is offered to clients that ask for it, when msgpack is installed.
+from importlib.util import find_spec
+
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('eventManagementAPI.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('eventManagementAPI.parsers.MessagePackParser')
+
 SPECTACULAR_SETTINGS = {
     'TITLE': 'Event Management API',
     'DESCRIPTION': 'A robust API for managing all aspects of events, from creation and participant registration to item management, bidding, awards, scenarios, attachments, templates, rules, and comprehensive event logging.',
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
     'COMPONENT_SPLIT_REQUEST': True,
+    'DEFAULT_GENERATOR_CLASS': 'eventManagementAPI.openapi.SchemaGenerator',
     'EXTERNAL_DOCS': [
         {
             'url': 'ttps://github.com/Laban254',
@@ -181,3 +248,87 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+
+# Days of change journal history kept for incremental sync clients.
+CHANGE_JOURNAL_RETENTION_DAYS = 30
+
+# Journal ids are allocated at insert but become visible at commit, so a sync
+# never hands out a cursor past entries younger than this many seconds; it
+# must exceed the longest request transaction. SQLite serializes writers, so
+# its ids already commit in order.
+CHANGE_JOURNAL_COMMIT_LAG = 10 if os.environ.get("POSTGRES_DB") else 0
+
+# Background jobs run by manage.py run_jobs. WORKERS is the size of the process
+# pool; RUNNING jobs without a heartbeat or progress update for STALE_AFTER
+# seconds are requeued (or failed after MAX_ATTEMPTS).
+JOBS = {
+    'WORKERS': int(os.environ.get('JOB_WORKERS', os.cpu_count() or 1)),
+    'POLL_INTERVAL': 1.0,
+    'STALE_AFTER': 600,
+    # Must stay well below STALE_AFTER.
+    'HEARTBEAT_INTERVAL': 60,
+    'MAX_ATTEMPTS': 3,
+    'EXPORT_DIR': 'exports',
+    # Rows deleted per statement when purging an event; keeps each lock short.
+    'PURGE_BATCH_SIZE': 5000,
+}
+
+# manage.py run_scheduler closes events at their end_time. Events ending within
+# HORIZON seconds are loaded every REFRESH_INTERVAL seconds.
+EVENT_SCHEDULER = {
+    'HORIZON': 3600,
+    'REFRESH_INTERVAL': 60,
+    'BATCH_SIZE': 500,
+    'COMPUTE_AWARDS': False,
+}
+
+# GET /api/events/{id}/bids/timeseries/ keeps the buckets that ended more than
+# SETTLE seconds ago in CACHE for TTL seconds, so each request only aggregates
+# the newest bids. SETTLE should exceed the longest bid transaction.
+BID_TIMESERIES = {
+    'CACHE': 'default',
+    'TTL': 24 * 3600,
+    'SETTLE': 60,
+}
+
+# Child rows are scoped to their event's owner with a join on events. With
+# CACHE_ENABLED the ids of each user's events are cached for TTL seconds and
+# used as event_id IN (...) instead, for users owning at most MAX_IDS events.
+OWNED_EVENTS = {
+    'CACHE_ENABLED': False,
+    'CACHE': 'default',
+    'TTL': 300,
+    'MAX_IDS': 1000,
+}
+
+# Response compression, see eventManagementAPI.middleware.CompressionMiddleware.
+# The client's preferred encoding among ENCODINGS is used; br and zstd need the
+# brotli and zstandard packages. Compressed bodies of at least CACHE_MIN_SIZE
+# bytes are kept in CACHE (None disables) for CACHE_TTL seconds.
+COMPRESSION = {
+    'ENCODINGS': ['zstd', 'br', 'gzip'],
+    'LEVELS': {'zstd': 3, 'br': 4, 'gzip': 6},
+    'MIN_SIZE': 1024,
+    'CACHE': 'default',
+    'CACHE_MIN_SIZE': 16 * 1024,
+    'CACHE_TTL': 3600,
+}
+
+# Prebuilt OpenAPI schema files, written by manage.py build_openapi_schema.
+OPENAPI_SCHEMA_DIR = BASE_DIR / 'openapi'
+
+
+# Request metrics and profiling, see eventManagementAPI.middleware.PerformanceMiddleware.
+PERFORMANCE_MONITORING = {
+    # Bearer token that lets scrapers read /metrics; without it only staff users can.
+    'METRICS_TOKEN': os.environ.get('METRICS_TOKEN'),
+    'SERVER_TIMING': DEBUG,
+    # Fraction of requests to profile; the slowest PROFILE_SLOWEST are kept in PROFILE_DIR.
+    'PROFILE_SAMPLE_RATE': float(os.environ.get('PROFILE_SAMPLE_RATE', 0)),
+    'PROFILE_SLOWEST': 20,
+    'PROFILE_DIR': os.path.join(BASE_DIR, 'profiles'),
+    # 'cprofile' or 'pyinstrument' (requires pyinstrument to be installed).
+    'PROFILER': 'cprofile',
+    # Log a warning when a view runs more queries than its viewset's query_budget.
+    'LOG_QUERY_BUDGET_BREACHES': True,
+}
@@ -0,0 +1,217 @@
+"""
+Token-bucket rate limiting on the Django cache.
+
+Rates come from ``REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']`` in the usual
+``"<requests>/<period>"`` form: a bucket holds that many tokens and refills at
+the same pace, so clients may burst up to the full rate. Each check is one
+cache read and one write (one script call on Redis, where it is atomic).
+
+When a throttle that keys on the client denies a request it also marks the
+client blocked for that method and path until a token is available again;
+``FastRejectMiddleware`` answers those requests with 429 before
+authentication, parsing or serializers run.
+
+The default local-memory cache limits each worker process separately;
+configure a Redis cache (``REDIS_URL``) to share buckets across workers.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS[1] bucket; ARGV capacity, refill per second, now, ttl. Returns {allowed, tokens left}.
+REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'stamp')
+local tokens = tonumber(state[1]) or capacity
+local stamp = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - stamp) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'stamp', tostring(now))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+return {allowed, tostring(tokens)}
+"""
+
+
+def parse_rate(rate):
+    """``'10/min'`` -> ``(10, 60)``; ``None`` disables the throttle."""
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def rate_limit_cache():
+    return caches[getattr(settings, 'RATE_LIMIT_CACHE', 'default')]
+
+
+def take_token(key, capacity, period, now=None):
+    """
+    Take a token from bucket ``key``. Returns ``(allowed, wait)`` where
+    ``wait`` is the number of seconds until the next token when denied.
+    """
+    cache = rate_limit_cache()
+    now = time.time() if now is None else now
+    rate = capacity / period
+    ttl = math.ceil(period)  # an idle bucket is full again after one period
+
+    if cache.__class__.__name__ == 'RedisCache':
+        client = cache._cache.get_client(key, write=True)
+        allowed, tokens = client.eval(REDIS_TAKE, 1, cache.make_and_validate_key(key), capacity, rate, now, ttl)
+        tokens = float(tokens)
+        allowed = bool(allowed)
+    else:
+        tokens, stamp = cache.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + max(0.0, now - stamp) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        cache.set(key, (tokens, now), ttl)
+    return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+
+def client_key(request):
+    """Identify a client before authentication: its address plus a digest of its credentials."""
+    credentials = request.META.get('HTTP_AUTHORIZATION', '')
+    ident = BaseThrottle().get_ident(request)
+    return hashlib.sha1(f'{ident}|{credentials}'.encode()).hexdigest()
+
+
+def block_key(request):
+    return f'throttle:blocked:{client_key(request)}:{request.method}:{request.path}'
+
+
+def blocked_for(request):
+    """Seconds the client must still wait for this method and path, or None."""
+    until = rate_limit_cache().get(block_key(request))
+    if until is None:
+        return None
+    wait = until - time.time()
+    return wait if wait > 0 else None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base class: subclasses set ``scope`` and implement ``get_key``, returning
+    None for requests the throttle does not apply to. ``blocks_client`` marks
+    throttles that key on the caller, whose denials ``FastRejectMiddleware``
+    may short-circuit.
+    """
+    scope = None
+    blocks_client = True
+    wait_seconds = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        limit = parse_rate(api_settings.DEFAULT_THROTTLE_RATES.get(self.scope))
+        if limit is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        allowed, self.wait_seconds = take_token(f'throttle:{self.scope}:{key}', *limit)
+        if not allowed and self.blocks_client:
+            rate_limit_cache().set(
+                block_key(request), time.time() + self.wait_seconds, math.ceil(self.wait_seconds),
+            )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class LoginRateThrottle(TokenBucketThrottle):
+    """Login attempts per client address."""
+    scope = 'login'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class LoginUsernameThrottle(TokenBucketThrottle):
+    """
+    Login attempts per username from one client address. Keying on the
+    username alone would let anyone lock its owner out by guessing from
+    elsewhere; guessing from many addresses is left to ``LoginRateThrottle``.
+    """
+    scope = 'login_username'
+    blocks_client = False
+
+    def get_key(self, request, view):
+        username = request.data.get('username') if hasattr(request.data, 'get') else None
+        if not username:
+            return None
+        return hashlib.sha1(f'{str(username).lower()}|{self.get_ident(request)}'.encode()).hexdigest()
+
+
+class BidUserThrottle(TokenBucketThrottle):
+    """Bid writes per authenticated user."""
+    scope = 'bid_user'
+
+    def get_key(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS') or not request.user.is_authenticated:
+            return None
+        return request.user.pk
+
+
+class BidEventThrottle(TokenBucketThrottle):
+    """Bid writes per event across all users, so one event's bidding war can't starve the rest."""
+    scope = 'bid_event'
+    blocks_client = False
+
+    def get_key(self, request, view):
+        if request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return None
+        event = request.data.get('event') if hasattr(request.data, 'get') else None
+        return event or None
+
+
+class ConcurrencyLimitMixin:
+    """
+    Limit how many requests one user may have in flight on a viewset at once
+    (``concurrency_limit``; ``None`` disables). Unsafe methods only.
+    """
+    concurrency_limit = None
+
+    def initial(self, request, *args, **kwargs):
+        self._concurrency_key = None
+        super().initial(request, *args, **kwargs)
+        if not self.concurrency_limit or request.method in ('GET', 'HEAD', 'OPTIONS'):
+            return
+        cache = rate_limit_cache()
+        key = f'throttle:inflight:{type(self).__name__}:{request.user.pk}'
+        # The timeout only matters if a worker dies between acquire and release.
+        cache.add(key, 0, 60)
+        try:
+            inflight = cache.incr(key)
+        except ValueError:  # expired since add()
+            cache.set(key, 1, 60)
+            inflight = 1
+        if inflight > self.concurrency_limit:
+            cache.decr(key)
+            raise Throttled(wait=1, detail='Too many concurrent requests.')
+        self._concurrency_key = key
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, '_concurrency_key', None):
+            try:
+                rate_limit_cache().decr(self._concurrency_key)
+            except ValueError:
+                pass
+            self._concurrency_key = None
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -1,16 +1,20 @@
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 from django.conf import settings
 from django.conf.urls.static import static
 from authentication.views import welcome_view
+from .metrics import metrics_view
+from .schema import lazy_view, schema_file_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', welcome_view, name='welcome'),
     path('api/', include('events.urls')),
     path('auth/', include('authentication.urls')),
-    path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
-    path('api/schema/swagger-ui/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
-    path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
+    path('metrics', metrics_view, name='metrics'),
+    # The schema is prebuilt by manage.py build_openapi_schema; the docs views are
+    # imported on first request so API workers don't load drf-spectacular.
+    path('api/schema/', schema_file_view, name='schema'),
+    path('api/schema/swagger-ui/', lazy_view('drf_spectacular.views.SpectacularSwaggerView', url_name='schema'), name='swagger-ui'),
+    path('api/schema/redoc/', lazy_view('drf_spectacular.views.SpectacularRedocView', url_name='schema'), name='redoc'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class EventsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "events"
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+
+        from . import signals, tasks  # noqa: F401
+        from .filters import install_interval_index
+        from .search import install_search_indexes
+
+        post_migrate.connect(install_search_indexes, sender=self)
+        post_migrate.connect(install_interval_index, sender=self)
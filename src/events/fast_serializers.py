@@ -0,0 +1,143 @@
+"""
+Read-only fast path for flat ModelSerializers.
+
+A ``ValuesPlan`` is compiled once per serializer class. It selects exactly the
+columns the serializer reads with ``values_list()`` and maps each row to a dict
+using the serializer's own field converters, skipping model instantiation and
+per-field attribute lookups. Output is identical to ``serializer.data``.
+"""
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+
+# Fields whose to_representation() is a no-op for values coming from the database.
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.JSONField,
+)
+
+
+class ValuesPlan:
+    def __init__(self, columns):
+        self.columns = columns
+
+    def queryset(self, queryset):
+        return queryset.values_list(*(column for _, column, _ in self.columns))
+
+    def to_representation(self, rows):
+        # Converters are bound per call so timezone-dependent ones resolve the
+        # active timezone once instead of once per row.
+        columns = [
+            (name, index, bind and bind())
+            for index, (name, _, bind) in enumerate(self.columns)
+        ]
+        return [
+            {
+                name: row[index] if convert is None or row[index] is None else convert(row[index])
+                for name, index, convert in columns
+            }
+            for row in rows
+        ]
+
+
+def _bind_datetime(field):
+    """Fold DateTimeField.to_representation's timezone lookup out of the row loop."""
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if not settings.USE_TZ or output_format is None or output_format.lower() != ISO_8601:
+        return lambda: field.to_representation
+
+    def bind():
+        field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+        def convert(value):
+            if isinstance(value, str):
+                return value
+            if timezone.is_aware(value):
+                value = value.astimezone(field_timezone)
+            else:
+                value = field.enforce_timezone(value)
+            value = value.isoformat()
+            if value.endswith('+00:00'):
+                value = value[:-6] + 'Z'
+            return value
+        return convert
+    return bind
+
+
+def _bind_decimal(field):
+    """Format already-quantized database Decimals directly, as DecimalField would."""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+        return lambda: field.to_representation
+    exponent = -field.decimal_places
+
+    def convert(value):
+        if isinstance(value, Decimal) and value.as_tuple().exponent == exponent:
+            return format(value, 'f')
+        return field.to_representation(value)
+    return lambda: convert
+
+
+def _column_for(serializer, field):
+    """Return ``(column, bind)`` for a field, or None when it needs the model instance."""
+    if len(field.source_attrs) != 1:
+        return None
+    model_field = next(
+        (f for f in serializer.Meta.model._meta.concrete_fields if f.name == field.source), None
+    )
+    if model_field is None:
+        return None
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        if field.pk_field is not None or not model_field.is_relation:
+            return None
+        return model_field.attname, None
+    if isinstance(field, (serializers.Serializer, serializers.ListSerializer, serializers.RelatedField,
+                          serializers.ManyRelatedField, serializers.FileField)):
+        return None
+    if type(field) in IDENTITY_FIELDS:
+        return model_field.attname, None
+    if type(field) is serializers.DateTimeField:
+        return model_field.attname, _bind_datetime(field)
+    if type(field) is serializers.DecimalField:
+        return model_field.attname, _bind_decimal(field)
+    return model_field.attname, lambda: field.to_representation
+
+
+@lru_cache(maxsize=None)
+def compile_plan(serializer_class):
+    """
+    Build the ValuesPlan for a serializer class.
+    Returns None when any readable field cannot be served from plain column values.
+    """
+    serializer = serializer_class()
+    columns = []
+    for field in serializer._readable_fields:
+        column = _column_for(serializer, field)
+        if column is None:
+            return None
+        columns.append((field.field_name, *column))
+    return ValuesPlan(columns)
+
+
+class FastListMixin:
+    """
+    Serve ``list`` through the serializer's ValuesPlan when it has one.
+    """
+
+    def list(self, request, *args, **kwargs):
+        plan = compile_plan(self.get_serializer_class())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        rows = plan.queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.to_representation(page))
+        return Response(plan.to_representation(rows))
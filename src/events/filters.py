@@ -0,0 +1,145 @@
+"""
+Time-range filters for events.
+
+Range filters are plain comparisons on ``start_time``/``end_time`` served by
+the composite B-tree indexes on ``Event``. On PostgreSQL the ``overlaps``
+filter is expressed as ``tstzrange(start_time, end_time) && ...`` so it can
+use a GiST index on that expression instead.
+"""
+from datetime import timedelta
+
+import django_filters
+from django.db import connections
+from django.db.models import Count, DateTimeField, ExpressionWrapper, F, Func, Subquery, Value
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .models import Event
+
+CALENDAR_BUCKETS = ('hour', 'day', 'week', 'month')
+MAX_CALENDAR_BUCKETS = 1000
+
+
+def interval_index_name():
+    return f'{Event._meta.db_table}_span_gist'
+
+
+def _span():
+    from django.contrib.postgres.fields import DateTimeRangeField
+    return Func(F('start_time'), F('end_time'), function='TSTZRANGE', output_field=DateTimeRangeField())
+
+
+def install_interval_index(using='default', **kwargs):
+    """Create the GiST index over event spans on PostgreSQL. Safe to re-run."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql' or Event._meta.db_table not in connection.introspection.table_names():
+        return
+    from django.contrib.postgres.indexes import GistIndex
+
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, Event._meta.db_table)
+    if interval_index_name() not in constraints:
+        with connection.schema_editor() as schema_editor:
+            schema_editor.add_index(Event, GistIndex(_span(), name=interval_index_name()))
+
+
+def overlapping(queryset, start, end):
+    """
+    Events whose [start_time, end_time) span overlaps [start, end). ``start``
+    and ``end`` may be datetimes or expressions such as subqueries.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.fields import DateTimeRangeField
+
+        start, end = (value if hasattr(value, 'resolve_expression') else Value(value) for value in (start, end))
+        window = Func(start, end, function='TSTZRANGE', output_field=DateTimeRangeField())
+        return queryset.alias(span=_span()).filter(span__overlap=window)
+    return queryset.filter(start_time__lt=end, end_time__gt=start)
+
+
+class EventFilter(django_filters.FilterSet):
+    starts_after = django_filters.IsoDateTimeFilter(field_name='start_time', lookup_expr='gte')
+    starts_before = django_filters.IsoDateTimeFilter(field_name='start_time', lookup_expr='lt')
+    ends_after = django_filters.IsoDateTimeFilter(field_name='end_time', lookup_expr='gt')
+    ends_before = django_filters.IsoDateTimeFilter(field_name='end_time', lookup_expr='lte')
+    active_at = django_filters.IsoDateTimeFilter(method='filter_active_at', label='Events running at this instant')
+    overlaps = django_filters.NumberFilter(method='filter_overlaps', label='Events overlapping the event with this id')
+
+    class Meta:
+        model = Event
+        fields = ['status', 'owner']
+
+    def filter_active_at(self, queryset, name, value):
+        return queryset.filter(start_time__lte=value, end_time__gt=value)
+
+    def filter_overlaps(self, queryset, name, value):
+        # Subqueries keep this inside the list query; an unknown id yields NULL bounds and no rows.
+        other = Event.objects.filter(pk=value)
+        return overlapping(
+            queryset, Subquery(other.values('start_time')[:1]), Subquery(other.values('end_time')[:1]),
+        ).exclude(pk=value)
+
+
+def truncate(value, kind):
+    """Python counterpart of ``Trunc(kind)`` in the current timezone."""
+    value = timezone.localtime(value).replace(second=0, microsecond=0)
+    if kind == 'minute':
+        return value
+    value = value.replace(minute=0)
+    if kind == 'hour':
+        return value
+    value = value.replace(hour=0)
+    if kind == 'week':
+        return value - timedelta(days=value.weekday())
+    if kind == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, kind):
+    if kind == 'hour':
+        return value + timedelta(hours=1)
+    if kind == 'day':
+        return value + timedelta(days=1)
+    if kind == 'week':
+        return value + timedelta(weeks=1)
+    return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+
+
+def calendar_buckets(queryset, start, end, kind):
+    """
+    Count the events starting in and active during each bucket of [start, end).
+
+    Only two grouped aggregates run in the database: events per start bucket
+    and events per last-active bucket. Active counts are then a running sum,
+    so the cost does not depend on how long each event lasts.
+    """
+    queryset = overlapping(queryset, start, end).order_by()
+    last_moment = ExpressionWrapper(F('end_time') - timedelta(microseconds=1), output_field=DateTimeField())
+    starts = dict(
+        queryset.annotate(bucket=Trunc('start_time', kind)).values('bucket')
+        .annotate(n=Count('pk')).values_list('bucket', 'n')
+    )
+    lasts = dict(
+        queryset.annotate(bucket=Trunc(last_moment, kind, output_field=DateTimeField())).values('bucket')
+        .annotate(n=Count('pk')).values_list('bucket', 'n')
+    )
+
+    bucket = truncate(start, kind)
+    active = sum(n for key, n in starts.items() if key < bucket)
+    buckets = []
+    while bucket < end:
+        starting = starts.get(bucket, 0)
+        active += starting
+        buckets.append({'start': bucket, 'starting': starting, 'active': active})
+        active -= lasts.get(bucket, 0)
+        bucket = next_bucket(bucket, kind)
+    return buckets
+
+
+def bucket_count(start, end, kind):
+    """Upper bound on the number of buckets, used to reject oversized windows."""
+    span = end - start
+    per_bucket = {'hour': timedelta(hours=1), 'day': timedelta(days=1),
+                  'week': timedelta(weeks=1), 'month': timedelta(days=28)}[kind]
+    return span // per_bucket + 2
@@ -0,0 +1,201 @@
+"""
+Database-backed background jobs.
+
+Views call ``enqueue`` and answer ``202 Accepted`` with the job; ``manage.py
+run_jobs`` claims queued rows and runs them in a process pool, so heavy work
+never holds a gunicorn worker. Tasks are plain functions registered with
+``@task`` that receive a ``JobContext`` first and report progress through it.
+
+While a task runs, a heartbeat thread bumps the job's ``updated_at`` so a
+long task is not mistaken for a dead worker and requeued. Every write a run
+makes is conditioned on the job still being in the attempt it claimed, so a
+run whose job was requeued anyway cannot overwrite the newer attempt.
+"""
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+
+def task(name):
+    """Register ``func(context, **arguments)`` as the task ``name``."""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def _claimed(job):
+    """The job's row, as long as it is still running the attempt ``job`` was loaded in."""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, attempts=job.attempts)
+
+
+class JobContext:
+    """Passed to tasks so they can report progress on their job."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def progress(self, percent, message=''):
+        percent = max(0, min(100, int(percent)))
+        _claimed(self.job).update(progress=percent, message=message[:255], updated_at=timezone.now())
+
+
+class Heartbeat(threading.Thread):
+    """Bump a running job's ``updated_at`` every ``interval`` seconds until stopped."""
+
+    def __init__(self, job, interval):
+        super().__init__(name=f'heartbeat-{job.pk}', daemon=True)
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def beat(self):
+        return bool(_claimed(self.job).update(updated_at=timezone.now()))
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                if not self.beat():
+                    return
+        except Exception:
+            logger.exception('Heartbeat for %s failed', self.job)
+        finally:
+            # Django connections are per thread; this only closes the heartbeat's own.
+            connections.close_all()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def enqueue(name, owner=None, **arguments):
+    """Queue task ``name``; an ``event_id`` argument also ties the job to that event."""
+    if name not in TASKS:
+        raise KeyError(f'Unknown task {name!r}')
+    job = Job.objects.create(task=name, owner=owner, event_id=arguments.get('event_id'), arguments=arguments)
+    logger.info('Queued %s', job)
+    return job
+
+
+def claim(limit):
+    """
+    Mark up to ``limit`` queued jobs as running and return their ids. The
+    status check in the UPDATE makes this safe with several workers on any
+    database backend: only one of them can move a given row out of QUEUED.
+    """
+    claimed = []
+    candidates = Job.objects.filter(status=Job.QUEUED).order_by('id').values_list('id', flat=True)[:limit * 2]
+    for job_id in candidates:
+        updated = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+            status=Job.RUNNING, started_at=timezone.now(), updated_at=timezone.now(), attempts=F('attempts') + 1,
+        )
+        if updated:
+            claimed.append(job_id)
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def requeue_stale(stale_after=None, max_attempts=None):
+    """Requeue running jobs whose worker stopped reporting, or fail them after too many attempts."""
+    config = settings.JOBS
+    stale_after = config['STALE_AFTER'] if stale_after is None else stale_after
+    max_attempts = config['MAX_ATTEMPTS'] if max_attempts is None else max_attempts
+    stale = Q(status=Job.RUNNING, updated_at__lt=timezone.now() - timedelta(seconds=stale_after))
+    failed = Job.objects.filter(stale, attempts__gte=max_attempts).update(
+        status=Job.FAILED, error='Worker stopped responding.', finished_at=timezone.now(),
+    )
+    requeued = Job.objects.filter(stale).update(status=Job.QUEUED, updated_at=timezone.now())
+    return requeued, failed
+
+
+def execute(job_id):
+    """
+    Run one claimed job to completion and record the outcome. Returns the
+    recorded status, or None when the job was requeued while it ran and the
+    outcome was discarded. Never raises.
+    """
+    job = Job.objects.get(pk=job_id)
+    heartbeat = Heartbeat(job, settings.JOBS['HEARTBEAT_INTERVAL'])
+    heartbeat.start()
+    try:
+        # Tasks manage their own transactions so progress updates are visible while they run.
+        result = TASKS[job.task](JobContext(job), **job.arguments)
+    except Exception:
+        logger.exception('%s failed', job)
+        status, fields = Job.FAILED, {'error': traceback.format_exc()}
+    else:
+        status, fields = Job.SUCCEEDED, {'progress': 100, 'result': result}
+    finally:
+        heartbeat.stop()
+    if not _claimed(job).update(status=status, finished_at=timezone.now(), updated_at=timezone.now(), **fields):
+        logger.warning('%s was requeued while it ran; discarding its outcome', job)
+        return None
+    return status
+
+
+def _execute_in_child(job_id):
+    try:
+        return execute(job_id)
+    finally:
+        connections.close_all()
+
+
+def run_worker(processes=None, burst=False, poll_interval=None):
+    """
+    Claim and run jobs until interrupted, or until the queue is empty when
+    ``burst`` is set. With ``processes=0`` jobs run in this process, one at a
+    time, which is handy for debugging and tests.
+    """
+    config = settings.JOBS
+    processes = config['WORKERS'] if processes is None else processes
+    if processes > 1 and connections['default'].vendor == 'sqlite':
+        # SQLite has a single writer; concurrent job transactions fail with "database is locked".
+        logger.warning('SQLite only supports one job process; ignoring processes=%d.', processes)
+        processes = 1
+    poll_interval = config['POLL_INTERVAL'] if poll_interval is None else poll_interval
+
+    if processes == 0:
+        while True:
+            requeue_stale()
+            job_ids = claim(1)
+            if job_ids:
+                execute(job_ids[0])
+            elif burst:
+                return
+            else:
+                time.sleep(poll_interval)
+
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork')) as pool:
+        running = set()
+        while True:
+            requeue_stale()
+            if len(running) < processes:
+                job_ids = claim(processes - len(running))
+                # Children are forked on submit; they must not inherit open connections.
+                connections.close_all()
+                running.update(pool.submit(_execute_in_child, job_id) for job_id in job_ids)
+            if not running:
+                if burst:
+                    return
+                time.sleep(poll_interval)
+                continue
+            done, running = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    logger.error('Job process crashed: %s', future.exception())
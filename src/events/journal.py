@@ -0,0 +1,180 @@
+"""
+Change journal backing incremental event sync.
+
+Every save or delete of an event or one of its child rows appends a
+``ChangeJournal`` row. Clients keep the id of the last row they saw as a
+cursor and ask for everything after it; rows are coalesced per object so a
+burst of edits to one bid costs one entry in the response. Writes made with
+``bulk_create`` or ``QuerySet.update`` bypass signals; callers journal them
+with ``record_many``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .fast_serializers import compile_plan
+from .permissions import OWNER_ONLY_RELATIONS
+from .models import (
+    Event, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog, ChangeJournal,
+)
+from .serializers import (
+    EventSummarySerializer, ItemSerializer, ParticipantSerializer, BidSerializer, ScenarioSerializer,
+    AwardSerializer, AttachmentSerializer, TemplateSerializer, EventRuleSerializer, EventLogSerializer,
+    DEFAULT_CHANGES_PAGE_SIZE,
+)
+
+JOURNALED_MODELS = {
+    'event': (Event, EventSummarySerializer),
+    'item': (Item, ItemSerializer),
+    'participant': (Participant, ParticipantSerializer),
+    'bid': (Bid, BidSerializer),
+    'scenario': (Scenario, ScenarioSerializer),
+    'award': (Award, AwardSerializer),
+    'attachment': (Attachment, AttachmentSerializer),
+    'template': (Template, TemplateSerializer),
+    'rule': (EventRule, EventRuleSerializer),
+    'log': (EventLog, EventLogSerializer),
+}
+MODEL_LABELS = {model: label for label, (model, _) in JOURNALED_MODELS.items()}
+OWNER_ONLY_LABELS = [MODEL_LABELS[model] for model in OWNER_ONLY_RELATIONS.values()]
+
+
+class CursorExpired(Exception):
+    """The requested cursor is older than the retained journal."""
+
+
+def event_id_for(instance):
+    if isinstance(instance, Event):
+        return instance.pk
+    if isinstance(instance, Award):
+        if Award.scenario.is_cached(instance):
+            return instance.scenario.event_id
+        return Scenario.objects.filter(pk=instance.scenario_id).values_list('event_id', flat=True).first()
+    return instance.event_id
+
+
+def record(instance, action):
+    event_id = event_id_for(instance)
+    if event_id is None:
+        return None
+    return ChangeJournal.objects.create(
+        event_id=event_id,
+        model=MODEL_LABELS[type(instance)],
+        object_id=instance.pk,
+        action=action,
+    )
+
+
+def record_many(label, rows, action):
+    """Journal ``(event_id, object_id)`` rows changed without signals, e.g. by ``QuerySet.update``."""
+    return ChangeJournal.objects.bulk_create([
+        ChangeJournal(event_id=event_id, model=label, object_id=object_id, action=action)
+        for event_id, object_id in rows
+    ])
+
+
+def record_event_deleted(event_id):
+    """Replace an event's journal with a single tombstone for the event itself."""
+    ChangeJournal.objects.filter(event_id=event_id).delete()
+    ChangeJournal.objects.create(
+        event_id=event_id, model='event', object_id=event_id, action=ChangeJournal.DELETED,
+    )
+
+
+def _serialize(label, ids):
+    model, serializer_class = JOURNALED_MODELS[label]
+    queryset = model.objects.filter(pk__in=ids)
+    plan = compile_plan(serializer_class)
+    if plan is not None:
+        rows = plan.to_representation(plan.queryset(queryset))
+    else:
+        rows = serializer_class(queryset, many=True).data
+    return {row['id']: row for row in rows}
+
+
+def _expired(event_id, cursor):
+    """
+    Whether ``trim`` may have removed entries of this event after ``cursor``.
+    Every event's journal starts with its own creation, so while that entry
+    is kept nothing of the event has been trimmed.
+    """
+    oldest = (
+        ChangeJournal.objects.filter(event_id=event_id).order_by('id')
+        .values_list('id', 'model', 'action').first()
+    )
+    if oldest is None:
+        return True
+    oldest_id, label, action = oldest
+    if label == 'event' and action == ChangeJournal.CREATED:
+        return False
+    return cursor < oldest_id - 1
+
+
+def changes_since(event_id, cursor=0, limit=DEFAULT_CHANGES_PAGE_SIZE, owner_view=True):
+    """
+    Return ``(changes, next_cursor, has_more)`` for an event.
+
+    Each change is ``{'model', 'id', 'action', 'data'}``; deletes are
+    tombstones with ``data`` set to None. Objects are fetched in one query
+    per model, at their current state. Without ``owner_view`` rows only the
+    owner may read are left out.
+    """
+    if cursor and _expired(event_id, cursor):
+        raise CursorExpired(cursor)
+
+    entries = ChangeJournal.objects.filter(event_id=event_id, id__gt=cursor)
+    if not owner_view:
+        entries = entries.exclude(model__in=OWNER_ONLY_LABELS)
+    lag = settings.CHANGE_JOURNAL_COMMIT_LAG
+    if lag:
+        # An entry with a lower id may still be uncommitted; hold back recent
+        # entries so the cursor can't move past it.
+        entries = entries.filter(timestamp__lt=timezone.now() - timedelta(seconds=lag))
+    entries = list(entries.order_by('id').values_list('id', 'model', 'object_id', 'action')[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    if not entries:
+        return [], cursor, False
+
+    latest = {}
+    for _, label, object_id, action in entries:
+        key = (label, object_id)
+        first = latest.get(key)
+        # Created-then-updated within one page is still a creation for the client.
+        if first == ChangeJournal.CREATED and action == ChangeJournal.UPDATED:
+            action = ChangeJournal.CREATED
+        latest.pop(key, None)
+        latest[key] = action
+
+    wanted = {}
+    for (label, object_id), action in latest.items():
+        if action != ChangeJournal.DELETED:
+            wanted.setdefault(label, []).append(object_id)
+    current = {label: _serialize(label, ids) for label, ids in wanted.items()}
+
+    changes = []
+    for (label, object_id), action in latest.items():
+        if action == ChangeJournal.DELETED:
+            changes.append({'model': label, 'id': object_id, 'action': action, 'data': None})
+            continue
+        data = current[label].get(object_id)
+        if data is None:
+            # Deleted after this page; its tombstone arrives in a later page.
+            continue
+        changes.append({'model': label, 'id': object_id, 'action': action, 'data': data})
+    return changes, entries[-1][0], has_more
+
+
+def trim(older_than_days, batch_size=10000):
+    """Delete journal rows older than the retention window in small batches."""
+    threshold = timezone.now() - timedelta(days=older_than_days)
+    deleted = 0
+    while True:
+        ids = list(
+            ChangeJournal.objects.filter(timestamp__lt=threshold)
+            .order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        deleted += ChangeJournal.objects.filter(id__in=ids).delete()[0]
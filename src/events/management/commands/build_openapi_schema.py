@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from eventManagementAPI.schema import build_schema_files
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema served at /api/schema/ to OPENAPI_SCHEMA_DIR."
+
+    def handle(self, *args, **options):
+        for path in build_schema_files():
+            self.stdout.write(str(path))
+        self.stdout.write(self.style.SUCCESS("OpenAPI schema built."))
@@ -0,0 +1,85 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Event, Item, Participant, Bid, Scenario, EventRule, EventLog
+from events.stats import rebuild_all_stats
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Generate synthetic events with items, participants, bids and logs using bulk_create."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--events', type=int, default=10)
+        parser.add_argument('--items', type=int, default=50, help='Items per event.')
+        parser.add_argument('--participants', type=int, default=20, help='Participants per event.')
+        parser.add_argument('--bids', type=int, default=500, help='Bids per event.')
+        parser.add_argument('--logs', type=int, default=100, help='Logs per event.')
+        parser.add_argument('--owner', default='synthetic', help='Username owning the events; created if missing.')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data sets.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        owner, _ = User.objects.get_or_create(username=options['owner'])
+        now = timezone.now()
+
+        with transaction.atomic():
+            events = Event.objects.bulk_create([
+                Event(
+                    name=f'Synthetic event {n}',
+                    description=f'Synthetic {rng.choice(["paper", "toner", "furniture", "laptops"])} auction',
+                    start_time=now + timedelta(hours=rng.randint(-720, 720)),
+                    end_time=now + timedelta(hours=rng.randint(721, 1440)),
+                    owner=owner,
+                    status=rng.choice([Event.DRAFT, Event.PUBLISHED, Event.PUBLISHED, Event.CLOSED]),
+                )
+                for n in range(options['events'])
+            ], batch_size=batch_size)
+
+            for event in events:
+                Item.objects.bulk_create([
+                    Item(event=event, name=f'Item {n}', description=f'Lot {n} of {event.description}',
+                         quantity=rng.randint(1, 1000))
+                    for n in range(options['items'])
+                ], batch_size=batch_size)
+                participants = Participant.objects.bulk_create([
+                    Participant(event=event, name=f'Supplier {n}', contact_info=f'supplier{n}@example.com',
+                                blocked=rng.random() < 0.05)
+                    for n in range(options['participants'])
+                ], batch_size=batch_size)
+                Scenario.objects.bulk_create([
+                    Scenario(event=event, name='Lowest price', description='Award each item to the best bid'),
+                ])
+                EventRule.objects.bulk_create([
+                    EventRule(event=event, rule_name='min_decrement', rule_value='1.00'),
+                    EventRule(event=event, rule_name='currency', rule_value='USD'),
+                ])
+                if participants:
+                    Bid.objects.bulk_create([
+                        Bid(event=event, participant=rng.choice(participants),
+                            amount=Decimal(rng.randint(100, 10_000_000)) / 100,
+                            is_alternative=rng.random() < 0.1)
+                        for _ in range(options['bids'])
+                    ], batch_size=batch_size)
+                EventLog.objects.bulk_create([
+                    EventLog(event=event, message=f'Synthetic log entry {n}')
+                    for n in range(options['logs'])
+                ], batch_size=batch_size)
+
+            # bulk_create skips the signals that maintain EventStats.
+            rebuild_all_stats()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(events)} event(s) owned by {owner.username} with "
+            f"{options['items']} items, {options['participants']} participants, "
+            f"{options['bids']} bids and {options['logs']} logs each."
+        ))
@@ -0,0 +1,65 @@
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$')
+
+# Loads the application the way a worker does before serving its first request.
+WORKER_STARTUP = """
+import resource
+from django.urls import get_resolver
+from eventManagementAPI.wsgi import application
+get_resolver()._populate()
+{extra}
+print('peak_rss_kb', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+DOCS_STARTUP = """
+from drf_spectacular.generators import SchemaGenerator
+from eventManagementAPI.schema import apply_pending_schemas
+apply_pending_schemas()
+"""
+
+
+class Command(BaseCommand):
+    help = "Report the slowest imports and peak memory of a fresh worker process."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--with-docs', action='store_true',
+                            help="Also load the OpenAPI machinery, as the schema views do on first use.")
+
+    def handle(self, *args, **options):
+        code = WORKER_STARTUP.format(extra=DOCS_STARTUP if options['with_docs'] else '')
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'eventManagementAPI.settings')}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+
+        modules = []
+        for line in result.stderr.splitlines():
+            match = IMPORTTIME_RE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+        peak_rss_kb = int(result.stdout.split()[-1])
+
+        top = options['top']
+        self.stdout.write(f"{'cumulative ms':>14}{'self ms':>10}  module")
+        for name, self_us, cumulative_us, _ in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+            self.stdout.write(f'{cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {name}')
+        self.stdout.write('')
+        self.stdout.write(f"{'self ms':>14}  module")
+        for name, self_us, _, _ in sorted(modules, key=lambda m: m[1], reverse=True)[:top]:
+            self.stdout.write(f'{self_us / 1000:>14.1f}  {name}')
+
+        total_ms = sum(m[2] for m in modules if m[3] == 0) / 1000
+        self.stdout.write('')
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(modules)} modules imported in {total_ms:.0f} ms; peak RSS {peak_rss_kb / 1024:.1f} MiB."
+        ))
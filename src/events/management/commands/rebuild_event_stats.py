@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from events.stats import rebuild_all_stats, refresh_event_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized EventStats rows from the child tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, action='append', dest='events',
+                            help='Only rebuild the given event id (may be repeated).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['events']:
+            for event_id in options['events']:
+                refresh_event_stats(event_id)
+            count = len(options['events'])
+        else:
+            count = rebuild_all_stats(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {count} event(s)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from events.jobs import run_worker
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=None,
+                            help="Size of the process pool (default JOBS['WORKERS']); 0 runs jobs in this process.")
+        parser.add_argument('--burst', action='store_true', help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        run_worker(processes=options['processes'], burst=options['burst'])
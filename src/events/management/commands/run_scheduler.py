@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from events.scheduler import CloseScheduler
+
+
+class Command(BaseCommand):
+    help = "Close events when their end time passes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Close the events that are due now and exit.")
+        parser.add_argument('--compute-awards', action='store_true', default=None,
+                            help="Queue a compute_awards job for every closed event.")
+
+    def handle(self, *args, **options):
+        scheduler = CloseScheduler(compute_awards=options['compute_awards'])
+        if options['once']:
+            closed = scheduler.tick()
+            self.stdout.write(self.style.SUCCESS(f"Closed {len(closed)} event(s)."))
+            return
+        scheduler.run()
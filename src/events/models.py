@@ -1,10 +1,27 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
-class Event(models.Model):
+class AtomicSaveMixin:
+    """
+    Save in one transaction with the post_save handlers that journal the row
+    and maintain EventStats. Deletes already run their signals inside the
+    collector's transaction.
+    """
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+class ActiveEventManager(models.Manager):
+    """Hide events that were deleted and are waiting to be purged"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+class Event(AtomicSaveMixin, models.Model):
     """Store info about events"""
     
     DRAFT = 'draft'
@@ -28,6 +45,18 @@ class Event(models.Model):
     owner = models.ForeignKey(User, related_name='event', on_delete=models.CASCADE)
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default=DRAFT)
     approval_for_publish = models.BooleanField(default=False)
+    # Set by EventViewSet.destroy; the purge_event job removes the rows afterwards.
+    deleted_at = models.DateTimeField(null=True, blank=True)
+
+    objects = ActiveEventManager()
+    all_objects = models.Manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_time', 'end_time'], name='event_start_end_idx'),
+            models.Index(fields=['end_time', 'start_time'], name='event_end_start_idx'),
+            models.Index(fields=['status', 'end_time'], name='event_status_end_idx'),
+        ]
 
     def clean(self):
         if self.start_time >= self.end_time:
@@ -38,7 +67,7 @@ class Event(models.Model):
     def __str__(self):
         return self.name
 
-class Item(models.Model):
+class Item(AtomicSaveMixin, models.Model):
     """Store info about items"""
 
     event = models.ForeignKey(Event, related_name='items', on_delete=models.CASCADE)
@@ -50,7 +79,7 @@ class Item(models.Model):
     def __str__(self):
         return self.name
 
-class Participant(models.Model):
+class Participant(AtomicSaveMixin, models.Model):
     """Store info about participants"""
 
     event = models.ForeignKey(Event, related_name='participants', on_delete=models.CASCADE)
@@ -61,7 +90,7 @@ class Participant(models.Model):
     def __str__(self):
         return self.name
 
-class Bid(models.Model):
+class Bid(AtomicSaveMixin, models.Model):
     """Store info about bids"""
 
     event = models.ForeignKey(Event, related_name='bids', on_delete=models.CASCADE)
@@ -70,10 +99,15 @@ class Bid(models.Model):
     timestamp = models.DateTimeField(auto_now_add=True)
     is_alternative = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'timestamp'], name='bid_event_time_idx'),
+        ]
+
     def __str__(self):
         return f"Bid by {self.participant.name} on {self.event.name}"
 
-class Scenario(models.Model):
+class Scenario(AtomicSaveMixin, models.Model):
     """Store info about scenarios"""
 
     event = models.ForeignKey(Event, related_name='scenarios', on_delete=models.CASCADE)
@@ -83,7 +117,7 @@ class Scenario(models.Model):
     def __str__(self):
         return self.name
 
-class Award(models.Model):
+class Award(AtomicSaveMixin, models.Model):
     """Store info about awards"""
 
     scenario = models.ForeignKey(Scenario, related_name='awards', on_delete=models.CASCADE)
@@ -95,7 +129,7 @@ class Award(models.Model):
     def __str__(self):
         return f"Award for {self.participant.name} on {self.item.name}"
 
-class Attachment(models.Model):
+class Attachment(AtomicSaveMixin, models.Model):
     """Store info about attachments"""
 
     event = models.ForeignKey(Event, related_name='attachments', on_delete=models.CASCADE)
@@ -105,7 +139,7 @@ class Attachment(models.Model):
     def __str__(self):
         return f"Attachment for {self.event.name}"
 
-class Template(models.Model):
+class Template(AtomicSaveMixin, models.Model):
     """Store info about templates"""
 
     name = models.CharField(max_length=255)
@@ -115,7 +149,7 @@ class Template(models.Model):
     def __str__(self):
         return self.name
 
-class EventRule(models.Model):
+class EventRule(AtomicSaveMixin, models.Model):
     """Store info about event rules"""
 
     event = models.ForeignKey(Event, related_name='rules', on_delete=models.CASCADE)
@@ -125,7 +159,7 @@ class EventRule(models.Model):
     def __str__(self):
         return f"Rule for {self.event.name}"
 
-class EventLog(models.Model):
+class EventLog(AtomicSaveMixin, models.Model):
     """Store info about event logs"""
 
     event = models.ForeignKey(Event, related_name='logs', on_delete=models.CASCADE)
@@ -134,3 +168,138 @@ class EventLog(models.Model):
 
     def __str__(self):
         return f"Log for {self.event.name}"
+
+class EventStats(models.Model):
+    """Store denormalized aggregates for an event"""
+
+    event = models.OneToOneField(Event, related_name='stats', on_delete=models.CASCADE, primary_key=True)
+    bid_count = models.PositiveIntegerField(default=0)
+    participant_count = models.PositiveIntegerField(default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    item_quantity = models.BigIntegerField(default=0)
+    highest_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    lowest_bid = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    def __str__(self):
+        return f"Stats for {self.event.name}"
+
+class ChangeJournal(models.Model):
+    """Store row changes per event for incremental sync"""
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+
+    ACTION_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    # The id doubles as the monotonic sync cursor. event_id is not a foreign
+    # key so tombstones survive the rows they describe.
+    event_id = models.BigIntegerField()
+    model = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=7, choices=ACTION_CHOICES)
+    timestamp = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event_id', 'id'], name='journal_event_cursor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} {self.model} {self.object_id}"
+
+class Job(models.Model):
+    """Store background jobs and their progress"""
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=64)
+    arguments = models.JSONField(default=dict, blank=True)
+    # Not a foreign key, so jobs that purge an event can outlive it.
+    event_id = models.BigIntegerField(null=True, blank=True)
+    owner = models.ForeignKey(User, related_name='jobs', on_delete=models.CASCADE, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} job {self.pk} ({self.status})"
+
+class EventSnapshot(models.Model):
+    """Store the frozen, gzipped representations of a closed or canceled event"""
+
+    event = models.OneToOneField(Event, related_name='snapshot', on_delete=models.CASCADE, primary_key=True)
+    # The retrieve response as the owner sees it, and as everyone else does,
+    # rendered on the first read for base_url so file URLs are absolute.
+    base_url = models.CharField(max_length=255, blank=True)
+    owner_detail = models.BinaryField(null=True)
+    owner_etag = models.CharField(max_length=66, blank=True)
+    public_detail = models.BinaryField(null=True)
+    public_etag = models.CharField(max_length=66, blank=True)
+    export = models.BinaryField()
+    created_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Snapshot of event {self.event_id}"
+
+class SearchRankField(models.FloatField):
+    """FTS5's ``rank`` column; ``events.search`` registers its ``match`` lookup"""
+
+class SearchIndex(models.Model):
+    """
+    A row of the SQLite FTS5 table ``events.search`` keeps for a model, joined
+    on rowid. The tables are created by ``install_search_indexes``.
+    """
+
+    rank = SearchRankField()
+
+    class Meta:
+        abstract = True
+        managed = False
+
+class EventSearchIndex(SearchIndex):
+    row = models.OneToOneField(Event, related_name='search_index', on_delete=models.DO_NOTHING,
+                               primary_key=True, db_column='rowid')
+
+    class Meta(SearchIndex.Meta):
+        db_table = 'events_event_fts'
+
+class ItemSearchIndex(SearchIndex):
+    row = models.OneToOneField(Item, related_name='search_index', on_delete=models.DO_NOTHING,
+                               primary_key=True, db_column='rowid')
+
+    class Meta(SearchIndex.Meta):
+        db_table = 'events_item_fts'
+
+class ParticipantSearchIndex(SearchIndex):
+    row = models.OneToOneField(Participant, related_name='search_index', on_delete=models.DO_NOTHING,
+                               primary_key=True, db_column='rowid')
+
+    class Meta(SearchIndex.Meta):
+        db_table = 'events_participant_fts'
@@ -1,7 +1,150 @@
+"""
+Ownership rules that run as queryset filters.
+
+A viewset names the path from its model to the owning user in a
+``OwnerPolicy`` (``'event__owner'`` for child rows). ``PolicyMixin`` adds
+that condition to ``get_queryset``, so authorization is part of the list or
+lookup query itself: a page of thousands of rows costs no extra query, and
+rows the user may not change are simply not found. Writes also check that
+the event a row is being attached to belongs to the user.
+
+With ``OWNED_EVENTS['CACHE_ENABLED']`` the ids of each user's events are
+cached and child rows are filtered with ``event_id IN (...)`` instead of a
+join on the events table.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from eventManagementAPI.metrics import record_cache
+
+from .models import Attachment, Award, Event, EventLog, Participant
+
+OWNER_SUFFIX = '__owner'
+
+# Rows only the event's owner may read. Their viewsets use scope_reads, and
+# event details and change feeds leave them out for everyone else.
+OWNER_ONLY_RELATIONS = {'participants': Participant, 'attachments': Attachment, 'logs': EventLog, 'awards': Award}
+
+
 class IsEventOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        return obj.owner == request.user
+        return obj.owner_id == request.user.pk
+
+
+def is_event_owner(request, event):
+    return request is not None and event.owner_id == request.user.pk
+
+
+def _cache():
+    return caches[settings.OWNED_EVENTS['CACHE']]
+
+
+def _owned_key(user_id):
+    return f'owned-events:{user_id}'
+
+
+def owned_event_ids(user):
+    """The ids of the events ``user`` owns, from the cache when possible."""
+    key = _owned_key(user.pk)
+    ids = _cache().get(key)
+    record_cache('owned_events', ids is not None)
+    if ids is None:
+        ids = frozenset(Event.objects.filter(owner=user).values_list('pk', flat=True))
+        _cache().set(key, ids, settings.OWNED_EVENTS['TTL'])
+    return ids
+
+
+def forget_owned_events(*user_ids):
+    _cache().delete_many([_owned_key(user_id) for user_id in user_ids if user_id is not None])
+
+
+class OwnerPolicy:
+    """
+    ``lookup`` leads from the model to the owning user. Reads are open to
+    every authenticated user unless ``scope_reads`` is set, as it is for rows
+    holding personal or internal data (participants, attachments, logs, awards). ``open_create``
+    lets anyone create rows (bids on someone else's event), and
+    ``shared_when_unset`` treats rows whose first lookup field is empty (a
+    template without an event) as everyone's.
+    """
+
+    def __init__(self, lookup, scope_reads=False, open_create=False, shared_when_unset=False):
+        self.lookup = lookup
+        self.scope_reads = scope_reads
+        self.open_create = open_create
+        self.shared_when_unset = shared_when_unset
+
+    def event_path(self):
+        """The lookup from the model to its event; None for events themselves and rows without one."""
+        if self.lookup.endswith('event' + OWNER_SUFFIX):
+            return self.lookup[:-len(OWNER_SUFFIX)]
+        return None
+
+    def live(self):
+        """Rows of deleted events stay until purge_event runs; this hides them meanwhile."""
+        path = self.event_path()
+        return Q(**{path + '__deleted_at__isnull': True}) if path else Q()
+
+    def condition(self, user):
+        config = settings.OWNED_EVENTS
+        path = self.event_path()
+        ids = owned_event_ids(user) if path and config['CACHE_ENABLED'] else None
+        if ids is not None and len(ids) <= config['MAX_IDS']:
+            # Only live events are cached, so this needs no join for live() either.
+            condition = Q(**{path + '_id__in': ids})
+        else:
+            condition = Q(**{self.lookup: user}) & self.live()
+        if self.shared_when_unset:
+            condition |= Q(**{self.lookup.split('__')[0] + '__isnull': True})
+        return condition
+
+    def filter_queryset(self, request, queryset):
+        if request.method in SAFE_METHODS and not self.scope_reads:
+            return queryset.filter(self.live())
+        return queryset.filter(self.condition(request.user))
+
+    def allows(self, user, data):
+        """Whether ``user`` may write ``data`` (validated serializer data) in terms of ownership."""
+        first, *rest = self.lookup.split('__')
+        if first not in data:  # partial update leaving the owner unchanged
+            return True
+        related = data[first]
+        if related is None:
+            return self.shared_when_unset
+        if not rest:
+            return related.pk == user.pk
+        for part in rest[:-1]:
+            related = getattr(related, part)
+        return getattr(related, rest[-1] + '_id') == user.pk
+
+    def check_write(self, request, data, creating):
+        if creating and self.open_create:
+            return
+        if not self.allows(request.user, data):
+            raise PermissionDenied('You do not own the event this row belongs to.')
+
+
+class PolicyMixin:
+    """Apply the viewset's ``permission_policy`` to its queryset and to the data it writes."""
+    permission_policy = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.permission_policy is None:
+            return queryset
+        return self.permission_policy.filter_queryset(self.request, queryset)
+
+    def perform_create(self, serializer):
+        if self.permission_policy is not None:
+            self.permission_policy.check_write(self.request, serializer.validated_data, creating=True)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        if self.permission_policy is not None:
+            self.permission_policy.check_write(self.request, serializer.validated_data, creating=False)
+        super().perform_update(serializer)
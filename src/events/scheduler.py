@@ -0,0 +1,96 @@
+"""
+Close events when their end_time passes.
+
+``CloseScheduler`` keeps a min-heap of ``(end_time, event_id)`` for open
+events ending within a horizon. The heap is rebuilt from an index range scan
+on ``(status, end_time)`` at start-up and every refresh interval, so nothing
+is lost across restarts and edits to ``end_time`` are picked up. Closing is a
+conditional UPDATE that rechecks status and end_time, which makes stale heap
+entries harmless.
+"""
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import journal
+from .jobs import enqueue
+from .models import ChangeJournal, Event
+
+logger = logging.getLogger(__name__)
+
+# Statuses in which an event is still running; besides the model's choices
+# this includes the ones EventViewSet's transitions set. Paused events are left
+# for their owner to resume or close.
+OPEN_STATUSES = [Event.PUBLISHED, 'republished', 'active', 'reopened', 'locked', 'unlocked']
+
+
+def close_events(event_ids, now):
+    """Close those of ``event_ids`` that are still open and have ended. Returns the closed ids."""
+    with transaction.atomic():
+        due = Event.objects.filter(pk__in=event_ids, status__in=OPEN_STATUSES, end_time__lte=now)
+        closed = list(due.select_for_update().values_list('pk', flat=True))
+        if closed:
+            Event.objects.filter(pk__in=closed).update(status=Event.CLOSED)
+            # QuerySet.update skips the signals that maintain the change journal.
+            journal.record_many('event', [(pk, pk) for pk in closed], ChangeJournal.UPDATED)
+    return closed
+
+
+class CloseScheduler:
+    def __init__(self, horizon=None, refresh_interval=None, batch_size=None, compute_awards=None):
+        config = settings.EVENT_SCHEDULER
+        self.horizon = timedelta(seconds=config['HORIZON'] if horizon is None else horizon)
+        self.refresh_interval = timedelta(
+            seconds=config['REFRESH_INTERVAL'] if refresh_interval is None else refresh_interval
+        )
+        self.batch_size = config['BATCH_SIZE'] if batch_size is None else batch_size
+        self.compute_awards = config['COMPUTE_AWARDS'] if compute_awards is None else compute_awards
+        self.heap = []
+        self.next_refresh = None
+
+    def rebuild(self, now):
+        """Load every open event ending before ``now + horizon``, including overdue ones."""
+        rows = Event.objects.filter(status__in=OPEN_STATUSES, end_time__lt=now + self.horizon)
+        self.heap = list(rows.values_list('end_time', 'pk'))
+        heapq.heapify(self.heap)
+        self.next_refresh = now + min(self.refresh_interval, self.horizon)
+        logger.debug('Scheduler loaded %d event(s)', len(self.heap))
+
+    def close_due(self, now):
+        """Pop and close everything due by ``now`` in batches. Returns the closed ids."""
+        closed = []
+        while self.heap and self.heap[0][0] <= now:
+            batch = []
+            while self.heap and self.heap[0][0] <= now and len(batch) < self.batch_size:
+                batch.append(heapq.heappop(self.heap)[1])
+            closed += close_events(batch, now)
+        for event_id in closed:
+            enqueue('build_snapshot', event_id=event_id)
+        if closed and self.compute_awards:
+            for event in Event.objects.filter(pk__in=closed).select_related('owner'):
+                enqueue('compute_awards', owner=event.owner, event_id=event.pk)
+        if closed:
+            logger.info('Closed %d event(s)', len(closed))
+        return closed
+
+    def tick(self, now=None):
+        now = now or timezone.now()
+        if self.next_refresh is None or now >= self.next_refresh:
+            self.rebuild(now)
+        return self.close_due(now)
+
+    def seconds_until_next(self, now):
+        wake = self.next_refresh
+        if self.heap:
+            wake = min(wake, self.heap[0][0])
+        return max(0.0, (wake - now).total_seconds())
+
+    def run(self):
+        while True:
+            self.tick()
+            time.sleep(self.seconds_until_next(timezone.now()))
@@ -1,4 +1,8 @@
-from drf_spectacular.utils import extend_schema_view, extend_schema
+from eventManagementAPI.schema import extend_schema_view, extend_schema
+from .serializers import (
+    CalendarQuerySerializer, ChangesQuerySerializer, JobSerializer, EventCopySerializer, EventSummarySerializer,
+    TimeseriesQuerySerializer,
+)
 
 event_viewset_schema = extend_schema_view(
     list=extend_schema(
@@ -23,7 +27,8 @@ event_viewset_schema = extend_schema_view(
     ),
     destroy=extend_schema(
         summary="Delete an event",
-        description="Delete an existing event instance.",
+        description="Hide the event immediately and queue a job that purges it and all of its rows.",
+        responses={202: JobSerializer},
     ),
     publish=extend_schema(
         summary="Publish an event",
@@ -61,6 +66,93 @@ event_viewset_schema = extend_schema_view(
         summary="Reopen an event",
         description="Reopen a closed event.",
     ),
+    calendar=extend_schema(
+        summary="Event calendar",
+        description="Return per-bucket counts of events starting in and active during a time window.",
+        parameters=[CalendarQuerySerializer],
+        responses={200: {
+            'type': 'object',
+            'properties': {
+                'start': {'type': 'string', 'format': 'date-time'},
+                'end': {'type': 'string', 'format': 'date-time'},
+                'bucket': {'type': 'string'},
+                'buckets': {'type': 'array', 'items': {
+                    'type': 'object',
+                    'properties': {
+                        'start': {'type': 'string', 'format': 'date-time'},
+                        'starting': {'type': 'integer'},
+                        'active': {'type': 'integer'},
+                    },
+                }},
+            },
+        }},
+    ),
+    changes=extend_schema(
+        summary="Sync event changes",
+        description="Return rows of the event created, updated or deleted since a cursor, with tombstones for deletes.",
+        parameters=[ChangesQuerySerializer],
+        responses={
+            200: {
+                'type': 'object',
+                'properties': {
+                    'cursor': {'type': 'integer'},
+                    'has_more': {'type': 'boolean'},
+                    'changes': {'type': 'array', 'items': {
+                        'type': 'object',
+                        'properties': {
+                            'model': {'type': 'string'},
+                            'id': {'type': 'integer'},
+                            'action': {'type': 'string', 'enum': ['created', 'updated', 'deleted']},
+                            'data': {'type': 'object', 'nullable': True},
+                        },
+                    }},
+                },
+            },
+            410: {'description': 'Cursor has expired; resync the event from scratch.'},
+        },
+    ),
+    bid_timeseries=extend_schema(
+        summary="Bid time series",
+        description="Return the open, high, low and close bid amount and the number of bids for each bucket holding bids, oldest first.",
+        parameters=[TimeseriesQuerySerializer],
+        responses={
+            200: {
+                'type': 'object',
+                'properties': {
+                    'bucket': {'type': 'string'},
+                    'buckets': {'type': 'array', 'items': {
+                        'type': 'object',
+                        'properties': {
+                            'start': {'type': 'string', 'format': 'date-time'},
+                            'open': {'type': 'string', 'format': 'decimal'},
+                            'high': {'type': 'string', 'format': 'decimal'},
+                            'low': {'type': 'string', 'format': 'decimal'},
+                            'close': {'type': 'string', 'format': 'decimal'},
+                            'count': {'type': 'integer'},
+                        },
+                    }},
+                },
+            },
+        },
+    ),
+    export=extend_schema(
+        summary="Export an event",
+        description="Queue a job that writes the event and all of its rows to a JSON file. Poll the job for the file URL.",
+        request=None,
+        responses={202: JobSerializer},
+    ),
+    compute_awards=extend_schema(
+        summary="Compute awards",
+        description="Queue a job that awards the event's items to the highest bidders.",
+        request=None,
+        responses={202: JobSerializer},
+    ),
+    clone=extend_schema(
+        summary="Clone an event",
+        description="Copy the event with its items, rules and scenarios, and optionally its participants, into a new draft event owned by the caller.",
+        request=EventCopySerializer,
+        responses={201: EventSummarySerializer},
+    ),
 )
 
 item_viewset_schema = extend_schema_view(
@@ -250,6 +342,12 @@ template_viewset_schema = extend_schema_view(
         summary="Delete a template",
         description="Delete an existing template instance.",
     ),
+    instantiate=extend_schema(
+        summary="Instantiate a template",
+        description="Create a draft event from the template: a copy of the template's event, if it has one, plus the template's rules. Templates without an event need start_time and end_time.",
+        request=EventCopySerializer,
+        responses={201: EventSummarySerializer},
+    ),
 )
 
 event_rule_viewset_schema = extend_schema_view(
@@ -305,3 +403,14 @@ event_log_viewset_schema = extend_schema_view(
         description="Delete an existing event log instance.",
     ),
 )
+
+job_viewset_schema = extend_schema_view(
+    list=extend_schema(
+        summary="List your jobs",
+        description="Return the background jobs you started, newest first.",
+    ),
+    retrieve=extend_schema(
+        summary="Retrieve a job",
+        description="Get the status, progress and result of a background job.",
+    ),
+)
@@ -0,0 +1,190 @@
+"""
+Ranked full-text search over events, items and participants.
+
+On SQLite each searchable model gets an external-content FTS5 table kept in
+sync by triggers, so bulk writes and raw updates are indexed too. Unmanaged
+``SearchIndex`` models map those tables so queries join them through the ORM. On
+PostgreSQL a GIN expression index over the same ``tsvector`` used at query
+time serves ``@@`` lookups. Other backends fall back to ``icontains``.
+"""
+import re
+from contextlib import closing
+from functools import lru_cache
+
+from django.db import connections
+from django.db.models import F, Lookup, Q
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Event, Item, Participant, SearchRankField
+
+SEARCH_FIELDS = {
+    Event: ('name', 'description'),
+    Item: ('name', 'description'),
+    Participant: ('name', 'contact_info'),
+}
+SEARCH_CONFIG = 'english'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_table(model):
+    """The FTS5 table of ``model``, mapped by the unmanaged ``<Model>SearchIndex``."""
+    return f'{model._meta.db_table}_fts'
+
+
+@SearchRankField.register_lookup
+class Match(Lookup):
+    """``search_index__rank__match=query``: FTS5's MATCH on the table the rank is joined from."""
+    lookup_name = 'match'
+    prepare_rhs = False  # the right-hand side is query text, not a rank
+
+    def as_sql(self, compiler, connection):
+        rhs, params = self.process_rhs(compiler, connection)
+        return f'{connection.ops.quote_name(self.lhs.alias)} MATCH {rhs}', params
+
+
+def gin_index_name(model):
+    return f'{model._meta.db_table}_search_gin'
+
+
+def _search_vector(fields):
+    from django.contrib.postgres.search import SearchVector
+    return SearchVector(*fields, config=SEARCH_CONFIG)
+
+
+@lru_cache(maxsize=None)
+def _sqlite_has_fts5():
+    import sqlite3
+    with closing(sqlite3.connect(':memory:')) as connection:
+        return bool(connection.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')").fetchone()[0])
+
+
+def _fts5_available(connection):
+    return connection.vendor == 'sqlite' and _sqlite_has_fts5()
+
+
+def _install_fts5(connection, model, fields):
+    qn = connection.ops.quote_name
+    table, fts, pk = model._meta.db_table, fts_table(model), model._meta.pk.column
+    columns = ', '.join(qn(f) for f in fields)
+    new_values = ', '.join(f'new.{qn(f)}' for f in fields)
+    old_values = ', '.join(f'old.{qn(f)}' for f in fields)
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts])
+        exists = cursor.fetchone() is not None
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {qn(fts)} USING fts5("
+            f"{columns}, content={qn(table)}, content_rowid={qn(pk)}, tokenize='unicode61 remove_diacritics 2')"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_ai')} AFTER INSERT ON {qn(table)} BEGIN "
+            f"INSERT INTO {qn(fts)}(rowid, {columns}) VALUES (new.{qn(pk)}, {new_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_ad')} AFTER DELETE ON {qn(table)} BEGIN "
+            f"INSERT INTO {qn(fts)}({qn(fts)}, rowid, {columns}) VALUES ('delete', old.{qn(pk)}, {old_values}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {qn(fts + '_au')} AFTER UPDATE OF {columns} ON {qn(table)} BEGIN "
+            f"INSERT INTO {qn(fts)}({qn(fts)}, rowid, {columns}) VALUES ('delete', old.{qn(pk)}, {old_values}); "
+            f"INSERT INTO {qn(fts)}(rowid, {columns}) VALUES (new.{qn(pk)}, {new_values}); END"
+        )
+        if not exists:
+            cursor.execute(f"INSERT INTO {qn(fts)}({qn(fts)}) VALUES ('rebuild')")
+
+
+def _install_gin(connection, model, fields):
+    from django.contrib.postgres.indexes import GinIndex
+
+    name = gin_index_name(model)
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, model._meta.db_table)
+    if name in constraints:
+        return
+    with connection.schema_editor() as schema_editor:
+        schema_editor.add_index(model, GinIndex(_search_vector(fields), name=name))
+
+
+def install_search_indexes(using='default', **kwargs):
+    """Create the search index structures for the current backend. Safe to re-run."""
+    connection = connections[using]
+    tables = set(connection.introspection.table_names())
+    for model, fields in SEARCH_FIELDS.items():
+        if model._meta.db_table not in tables:
+            continue
+        if _fts5_available(connection):
+            _install_fts5(connection, model, fields)
+        elif connection.vendor == 'postgresql':
+            _install_gin(connection, model, fields)
+
+
+def fts5_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match, and the last
+    word also matches as a prefix so results appear while the user types.
+    """
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return ''
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def search(queryset, text):
+    """Filter ``queryset`` to rows matching ``text`` and order them best match first."""
+    model = queryset.model
+    fields = SEARCH_FIELDS[model]
+    connection = connections[queryset.db]
+
+    if _fts5_available(connection):
+        query = fts5_query(text)
+        if not query:
+            return queryset
+        # One MATCH, on the FTS table joined by rowid, provides both the filter
+        # and the rank (FTS5's bm25(), where lower means more relevant).
+        return queryset.filter(search_index__rank__match=query).annotate(
+            search_rank=F('search_index__rank'),
+        ).order_by('search_rank', 'pk')
+
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        vector = _search_vector(fields)
+        return queryset.alias(search_document=vector).filter(
+            search_document=query
+        ).annotate(
+            search_rank=SearchRank(vector, query)
+        ).order_by('-search_rank', 'pk')
+
+    condition = Q()
+    for token in _TOKEN_RE.findall(text):
+        token_condition = Q()
+        for field in fields:
+            token_condition |= Q(**{f'{field}__icontains': token})
+        condition &= token_condition
+    return queryset.filter(condition)
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Filter backend for ``?q=`` searches, ranked by relevance.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+        return search(queryset, text)
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.search_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Full-text search terms; results are ordered by relevance.',
+            'schema': {'type': 'string'},
+        }]
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import Event, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog
+from .filters import CALENDAR_BUCKETS, MAX_CALENDAR_BUCKETS, bucket_count
+from .permissions import OWNER_ONLY_RELATIONS, is_event_owner
+from .timeseries import BUCKETS as TIMESERIES_BUCKETS
+from .models import Event, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog, Job
 
 class ItemSerializer(serializers.ModelSerializer):
     """Item Serializer"""
@@ -115,6 +118,14 @@ class EventLogSerializer(serializers.ModelSerializer):
             'timestamp': {'help_text': 'Time when the log was created'}
         }
 
+class EventSummarySerializer(serializers.ModelSerializer):
+    """Event Serializer without nested relations"""
+
+    class Meta:
+        model = Event
+        fields = ['id', 'name', 'description', 'start_time', 'end_time', 'owner', 'status', 'approval_for_publish']
+
+
 class EventSerializer(serializers.ModelSerializer):
     """Event Serializer"""
     
@@ -126,11 +137,18 @@ class EventSerializer(serializers.ModelSerializer):
     attachments = AttachmentSerializer(many=True, read_only=True)
     rules = EventRuleSerializer(many=True, read_only=True)
     logs = EventLogSerializer(many=True, read_only=True)
+    bid_count = serializers.IntegerField(source='stats.bid_count', read_only=True, help_text='Number of bids placed on the event')
+    participant_count = serializers.IntegerField(source='stats.participant_count', read_only=True, help_text='Number of participants in the event')
+    item_count = serializers.IntegerField(source='stats.item_count', read_only=True, help_text='Number of items in the event')
+    item_quantity = serializers.IntegerField(source='stats.item_quantity', read_only=True, help_text='Total quantity across all items')
+    highest_bid = serializers.DecimalField(source='stats.highest_bid', max_digits=10, decimal_places=2, read_only=True, help_text='Highest bid amount')
+    lowest_bid = serializers.DecimalField(source='stats.lowest_bid', max_digits=10, decimal_places=2, read_only=True, help_text='Lowest bid amount')
 
     class Meta:
         model = Event
         fields = ['id', 'name', 'description', 'start_time', 'end_time', 'owner', 'status', 'approval_for_publish', 
-                  'items', 'participants', 'bids', 'scenarios', 'awards', 'attachments', 'rules', 'logs']
+                  'items', 'participants', 'bids', 'scenarios', 'awards', 'attachments', 'rules', 'logs',
+                  'bid_count', 'participant_count', 'item_count', 'item_quantity', 'highest_bid', 'lowest_bid']
         extra_kwargs = {
             'name': {'help_text': 'Name of the event'},
             'description': {'help_text': 'Description of the event'},
@@ -141,6 +159,20 @@ class EventSerializer(serializers.ModelSerializer):
             'approval_for_publish': {'help_text': 'Approval status for publishing the event'}
         }
 
+    def to_representation(self, instance):
+        """
+        Leave rows only the owner may read out for everyone else. The
+        ``owner_view`` context entry overrides the check against the request.
+        """
+        data = super().to_representation(instance)
+        owner_view = self.context.get('owner_view')
+        if owner_view is None:
+            owner_view = is_event_owner(self.context.get('request'), instance)
+        if not owner_view:
+            for name in OWNER_ONLY_RELATIONS:
+                data.pop(name, None)
+        return data
+
     def validate(self, data):
         """
         Validates the Event data.
@@ -151,3 +183,79 @@ class EventSerializer(serializers.ModelSerializer):
         if data['status'] == Event.PUBLISHED and not data.get('approval_for_publish', False):
             raise serializers.ValidationError("Event cannot be published without approval.")
         return data
+
+class EventCopySerializer(serializers.Serializer):
+    """Event clone and template instantiation parameters"""
+
+    name = serializers.CharField(max_length=255, required=False, help_text='Name of the new event; defaults to the source name')
+    description = serializers.CharField(required=False, allow_blank=True, help_text='Description of the new event; defaults to the source description')
+    start_time = serializers.DateTimeField(required=False, help_text='Start of the new event; defaults to the source start')
+    end_time = serializers.DateTimeField(required=False, help_text='End of the new event; defaults to keeping the source duration')
+    include_participants = serializers.BooleanField(default=False, help_text='Also copy the participants')
+
+    def validate(self, data):
+        if 'start_time' in data and 'end_time' in data and data['start_time'] >= data['end_time']:
+            raise serializers.ValidationError("End time must be after start time.")
+        return data
+
+class JobSerializer(serializers.ModelSerializer):
+    """Job Serializer"""
+
+    class Meta:
+        model = Job
+        fields = ['id', 'task', 'event_id', 'status', 'progress', 'message', 'result', 'error',
+                  'created_at', 'started_at', 'finished_at']
+        read_only_fields = fields
+        extra_kwargs = {
+            'task': {'help_text': 'Name of the task the job runs'},
+            'event_id': {'help_text': 'The event the job works on'},
+            'status': {'help_text': 'queued, running, succeeded or failed'},
+            'progress': {'help_text': 'Completion percentage reported by the task'},
+            'message': {'help_text': 'Latest progress message'},
+            'result': {'help_text': 'Task result once the job has succeeded'},
+            'error': {'help_text': 'Traceback when the job failed'},
+        }
+
+class CalendarQuerySerializer(serializers.Serializer):
+    """Calendar window query parameters"""
+
+    start = serializers.DateTimeField(help_text='Start of the window (inclusive)')
+    end = serializers.DateTimeField(help_text='End of the window (exclusive)')
+    bucket = serializers.ChoiceField(choices=CALENDAR_BUCKETS, default='day', help_text='Bucket size')
+
+    def validate(self, data):
+        if data['start'] >= data['end']:
+            raise serializers.ValidationError("End must be after start.")
+        if bucket_count(data['start'], data['end'], data['bucket']) > MAX_CALENDAR_BUCKETS:
+            raise serializers.ValidationError(
+                f"Window spans more than {MAX_CALENDAR_BUCKETS} buckets; use a larger bucket."
+            )
+        return data
+
+
+DEFAULT_CHANGES_PAGE_SIZE = 1000
+MAX_CHANGES_PAGE_SIZE = 5000
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    """Delta sync query parameters"""
+
+    since = serializers.IntegerField(min_value=0, default=0, help_text='Cursor returned by the previous sync; 0 for a full sync')
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_CHANGES_PAGE_SIZE, default=DEFAULT_CHANGES_PAGE_SIZE, help_text='Maximum journal entries to consume')
+
+
+class TimeseriesQuerySerializer(serializers.Serializer):
+    """Bid time series query parameters"""
+
+    bucket = serializers.ChoiceField(choices=list(TIMESERIES_BUCKETS), default='1m', help_text='Bucket size')
+
+
+class BidBucketSerializer(serializers.Serializer):
+    """Bids placed in one time bucket"""
+
+    start = serializers.DateTimeField(help_text='Start of the bucket')
+    open = serializers.DecimalField(max_digits=10, decimal_places=2, help_text='Amount of the first bid')
+    high = serializers.DecimalField(max_digits=10, decimal_places=2, help_text='Highest amount')
+    low = serializers.DecimalField(max_digits=10, decimal_places=2, help_text='Lowest amount')
+    close = serializers.DecimalField(max_digits=10, decimal_places=2, help_text='Amount of the last bid')
+    count = serializers.IntegerField(help_text='Number of bids')
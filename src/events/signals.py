@@ -0,0 +1,182 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import journal, snapshots, stats, timeseries
+from .jobs import enqueue
+from .permissions import forget_owned_events
+from .models import ChangeJournal, Event, EventStats, Item, Participant, Bid
+
+
+def _remember_previous(sender, instance, *fields):
+    """Keep the stored values of ``fields`` so post_save can compute deltas."""
+    if instance.pk is None:
+        instance._previous = None
+        return
+    instance._previous = sender.objects.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=Event)
+def create_event_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        EventStats.objects.get_or_create(event=instance)
+
+
+@receiver(pre_save, sender=Event)
+def remember_event_owner(sender, instance, raw=False, **kwargs):
+    if not raw and settings.OWNED_EVENTS['CACHE_ENABLED']:
+        _remember_previous(sender, instance, 'owner_id')
+
+
+@receiver(post_save, sender=Event)
+def drop_owned_events(sender, instance, created, raw=False, **kwargs):
+    """Keep the cached event ids per owner in step with new events and owner changes."""
+    if raw or not settings.OWNED_EVENTS['CACHE_ENABLED']:
+        return
+    previous = getattr(instance, '_previous', None)
+    if created:
+        owners = [instance.owner_id]
+    elif previous and previous['owner_id'] != instance.owner_id:
+        owners = [previous['owner_id'], instance.owner_id]
+    else:
+        return
+    # Forgetting before the commit would let a concurrent request cache the old ids again.
+    transaction.on_commit(lambda: forget_owned_events(*owners))
+
+
+@receiver(pre_save, sender=Bid)
+def remember_bid(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_previous(sender, instance, 'event_id', 'amount')
+
+
+@receiver(post_save, sender=Bid)
+def update_stats_for_bid(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.bid_added(instance.event_id, instance.amount)
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous and previous['event_id'] != instance.event_id:
+        stats.refresh_bid_stats(previous['event_id'])
+    if not previous or previous != {'event_id': instance.event_id, 'amount': instance.amount}:
+        stats.refresh_bid_stats(instance.event_id)
+
+
+@receiver(post_delete, sender=Bid)
+def update_stats_for_deleted_bid(sender, instance, **kwargs):
+    stats.bid_removed(instance.event_id, instance.amount)
+
+
+@receiver(post_save, sender=Bid)
+def drop_bid_timeseries(sender, instance, created, raw=False, **kwargs):
+    """New bids normally land in an unsettled bucket; edits may change settled ones."""
+    if raw:
+        return
+    if created:
+        transaction.on_commit(lambda: timeseries.bid_committed(instance))
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous and previous['event_id'] != instance.event_id:
+        timeseries.invalidate(previous['event_id'])
+    timeseries.invalidate(instance.event_id)
+
+
+@receiver(post_delete, sender=Bid)
+def drop_deleted_bid_timeseries(sender, instance, **kwargs):
+    timeseries.invalidate(instance.event_id)
+
+
+@receiver(pre_save, sender=Participant)
+def remember_participant(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_previous(sender, instance, 'event_id')
+
+
+@receiver(post_save, sender=Participant)
+def update_stats_for_participant(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.participant_added(instance.event_id)
+        return
+    previous = getattr(instance, '_previous', None)
+    if previous and previous['event_id'] != instance.event_id:
+        stats.participant_removed(previous['event_id'])
+        stats.participant_added(instance.event_id)
+
+
+@receiver(post_delete, sender=Participant)
+def update_stats_for_deleted_participant(sender, instance, **kwargs):
+    stats.participant_removed(instance.event_id)
+
+
+@receiver(pre_save, sender=Item)
+def remember_item(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_previous(sender, instance, 'event_id', 'quantity')
+
+
+@receiver(post_save, sender=Item)
+def update_stats_for_item(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        stats.item_added(instance.event_id, instance.quantity)
+        return
+    previous = getattr(instance, '_previous', None)
+    if not previous:
+        return
+    if previous['event_id'] != instance.event_id:
+        stats.item_removed(previous['event_id'], previous['quantity'])
+        stats.item_added(instance.event_id, instance.quantity)
+    elif previous['quantity'] != instance.quantity:
+        stats.item_quantity_changed(instance.event_id, instance.quantity - previous['quantity'])
+
+
+@receiver(post_delete, sender=Item)
+def update_stats_for_deleted_item(sender, instance, **kwargs):
+    stats.item_removed(instance.event_id, instance.quantity)
+
+
+def journal_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        journal.record(instance, ChangeJournal.CREATED if created else ChangeJournal.UPDATED)
+
+
+def journal_delete(sender, instance, **kwargs):
+    if isinstance(instance, Event):
+        journal.record_event_deleted(instance.pk)
+    else:
+        journal.record(instance, ChangeJournal.DELETED)
+
+
+for model, _ in journal.JOURNALED_MODELS.values():
+    post_save.connect(journal_save, sender=model, dispatch_uid=f'journal_save_{model.__name__}')
+    post_delete.connect(journal_delete, sender=model, dispatch_uid=f'journal_delete_{model.__name__}')
+
+
+@receiver(post_save, sender=Event)
+def refresh_event_snapshot(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    snapshots.invalidate(instance.pk)
+    if instance.status in snapshots.FROZEN_STATUSES and instance.deleted_at is None:
+        enqueue('build_snapshot', event_id=instance.pk)
+
+
+def drop_snapshot(sender, instance, raw=False, **kwargs):
+    """A frozen event's row changed: rebuild its snapshot."""
+    if raw:
+        return
+    event_id = journal.event_id_for(instance)
+    if event_id is not None and snapshots.invalidate(event_id):
+        enqueue('build_snapshot', event_id=event_id)
+
+
+for model, _ in journal.JOURNALED_MODELS.values():
+    if model is not Event:
+        post_save.connect(drop_snapshot, sender=model, dispatch_uid=f'snapshot_save_{model.__name__}')
+        post_delete.connect(drop_snapshot, sender=model, dispatch_uid=f'snapshot_delete_{model.__name__}')
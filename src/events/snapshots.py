@@ -0,0 +1,116 @@
+"""
+Frozen representations of events that can no longer change.
+
+When an event is saved in a ``FROZEN_STATUSES`` status a ``build_snapshot``
+job stores its export document gzipped in ``EventSnapshot``, and exports
+copy it. The first retrieve then renders the event with its request, once as
+the owner sees it and once without the rows only the owner may read, so file
+URLs are absolute as in live responses; later retrieves from the same scheme
+and host answer with the stored bytes for the caller's audience after a
+single primary-key lookup. Any save of the event, or a change to one of its
+rows, drops the snapshot; it is rebuilt while the event stays frozen.
+"""
+import gzip
+import hashlib
+
+from django.db.models import prefetch_related_objects
+
+from eventManagementAPI.renderers import ORJSONRenderer
+
+from .fast_serializers import compile_plan
+from .models import (
+    Event, EventSnapshot, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog,
+)
+from .serializers import (
+    EventSerializer, EventSummarySerializer, ItemSerializer, ParticipantSerializer, BidSerializer,
+    ScenarioSerializer, AwardSerializer, AttachmentSerializer, TemplateSerializer, EventRuleSerializer,
+    EventLogSerializer,
+)
+
+# 'cancelled' and 'stopped' are what EventViewSet's cancel and stop actions set.
+FROZEN_STATUSES = [Event.CLOSED, Event.CANCELED, 'cancelled', 'stopped']
+
+EXPORT_SECTIONS = [
+    ('items', Item, ItemSerializer, 'event_id'),
+    ('participants', Participant, ParticipantSerializer, 'event_id'),
+    ('bids', Bid, BidSerializer, 'event_id'),
+    ('scenarios', Scenario, ScenarioSerializer, 'event_id'),
+    ('awards', Award, AwardSerializer, 'scenario__event_id'),
+    ('attachments', Attachment, AttachmentSerializer, 'event_id'),
+    ('templates', Template, TemplateSerializer, 'event_id'),
+    ('rules', EventRule, EventRuleSerializer, 'event_id'),
+    ('logs', EventLog, EventLogSerializer, 'event_id'),
+]
+
+
+def _serialize(serializer_class, queryset):
+    plan = compile_plan(serializer_class)
+    if plan is not None:
+        return plan.to_representation(plan.queryset(queryset))
+    return serializer_class(queryset, many=True).data
+
+
+def export_document(event, progress=None):
+    """The event with every one of its rows, as written by the export job."""
+    document = dict(EventSummarySerializer(event).data)
+    for done, (name, model, serializer_class, lookup) in enumerate(EXPORT_SECTIONS):
+        if progress is not None:
+            progress(done * 100 // (len(EXPORT_SECTIONS) + 1), f'Exporting {name}')
+        document[name] = _serialize(serializer_class, model.objects.filter(**{lookup: event.pk}).order_by('pk'))
+    return document
+
+
+def render(data):
+    return ORJSONRenderer().render(data)
+
+
+def _etag(body):
+    return '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+
+
+def build_snapshot(event_id):
+    """Store the export and reset the details; returns None if the event is gone or no longer frozen."""
+    event = Event.objects.filter(pk=event_id, status__in=FROZEN_STATUSES).first()
+    if event is None:
+        return None
+    export = render(export_document(event))
+    snapshot, _ = EventSnapshot.objects.update_or_create(event_id=event_id, defaults={
+        'base_url': '',
+        'owner_detail': None,
+        'owner_etag': '',
+        'public_detail': None,
+        'public_etag': '',
+        'export': gzip.compress(export, mtime=0),
+    })
+    return snapshot
+
+
+def fill_details(event, request):
+    """
+    Render ``event``'s retrieve response for both audiences with ``request``
+    and store it on its snapshot, unless that was dropped or rebuilt meanwhile.
+    ``event`` needs ``stats`` and ``snapshot`` loaded. Returns the snapshot.
+    """
+    snapshot = event.snapshot
+    prefetch_related_objects([event], 'items', 'participants', 'bids', 'scenarios', 'attachments', 'rules', 'logs')
+    fields = {'base_url': request.build_absolute_uri('/')}
+    for audience, owner_view in (('owner', True), ('public', False)):
+        detail = render(EventSerializer(event, context={'request': request, 'owner_view': owner_view}).data)
+        fields[f'{audience}_detail'] = gzip.compress(detail, mtime=0)
+        fields[f'{audience}_etag'] = _etag(detail)
+    EventSnapshot.objects.filter(pk=snapshot.pk, created_at=snapshot.created_at).update(**fields)
+    for name, value in fields.items():
+        setattr(snapshot, name, value)
+    return snapshot
+
+
+def invalidate(event_id):
+    """
+    Drop the event's snapshot; returns whether there was one. Live events
+    have none, so writes to them cost a primary-key read, not a DELETE.
+    """
+    snapshot = EventSnapshot.objects.filter(pk=event_id)
+    if not snapshot.exists():
+        return False
+    deleted, _ = snapshot.delete()
+    return bool(deleted)
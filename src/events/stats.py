@@ -0,0 +1,146 @@
+from django.db import transaction
+from django.db.models import Case, Count, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .models import Event, EventStats, Item, Participant, Bid
+
+
+def _bid_aggregates(event_id):
+    return Bid.objects.filter(event_id=event_id).aggregate(
+        bid_count=Count('id'),
+        highest_bid=Max('amount'),
+        lowest_bid=Min('amount'),
+    )
+
+
+def _item_aggregates(event_id):
+    return Item.objects.filter(event_id=event_id).aggregate(
+        item_count=Count('id'),
+        item_quantity=Coalesce(Sum('quantity'), 0),
+    )
+
+
+def refresh_bid_stats(event_id):
+    """Recompute the bid columns of an event's stats from the bid table."""
+    return EventStats.objects.filter(event_id=event_id).update(**_bid_aggregates(event_id))
+
+
+def refresh_event_stats(event_id):
+    """Recompute every column of an event's stats, creating the row if needed."""
+    values = {
+        'participant_count': Participant.objects.filter(event_id=event_id).count(),
+        **_bid_aggregates(event_id),
+        **_item_aggregates(event_id),
+    }
+    stats, _ = EventStats.objects.update_or_create(event_id=event_id, defaults=values)
+    return stats
+
+
+STAT_FIELDS = ['bid_count', 'highest_bid', 'lowest_bid', 'item_count', 'item_quantity', 'participant_count']
+
+
+def rebuild_all_stats(batch_size=1000):
+    """
+    Recompute stats for every event from scratch.
+    Rows are updated in place, or created when missing.
+    """
+    with transaction.atomic():
+        # Lock the rows before reading the children: a concurrent child write
+        # then waits and applies its increment on top of the rebuilt row
+        # instead of being overwritten by it.
+        existing = set(EventStats.objects.select_for_update().values_list('event_id', flat=True))
+        rows = _computed_stats()
+        EventStats.objects.bulk_update(
+            [row for row in rows if row.event_id in existing], STAT_FIELDS, batch_size=batch_size,
+        )
+        EventStats.objects.bulk_create([row for row in rows if row.event_id not in existing], batch_size=batch_size)
+    return len(rows)
+
+
+def _computed_stats():
+    """An unsaved EventStats row per event, computed with one grouped aggregate per child table."""
+    bids = {
+        row['event_id']: row for row in
+        Bid.objects.values('event_id').annotate(
+            bid_count=Count('id'), highest_bid=Max('amount'), lowest_bid=Min('amount'),
+        )
+    }
+    items = {
+        row['event_id']: row for row in
+        Item.objects.values('event_id').annotate(item_count=Count('id'), item_quantity=Sum('quantity'))
+    }
+    participants = dict(
+        Participant.objects.values('event_id').annotate(n=Count('id')).values_list('event_id', 'n')
+    )
+
+    return [
+        EventStats(
+            event_id=event_id,
+            bid_count=bids.get(event_id, {}).get('bid_count', 0),
+            highest_bid=bids.get(event_id, {}).get('highest_bid'),
+            lowest_bid=bids.get(event_id, {}).get('lowest_bid'),
+            item_count=items.get(event_id, {}).get('item_count', 0),
+            item_quantity=items.get(event_id, {}).get('item_quantity') or 0,
+            participant_count=participants.get(event_id, 0),
+        )
+        for event_id in Event.objects.values_list('id', flat=True)
+    ]
+
+
+def bid_added(event_id, amount):
+    amount_field = EventStats._meta.get_field('highest_bid')
+    updated = EventStats.objects.filter(event_id=event_id).update(
+        bid_count=F('bid_count') + 1,
+        highest_bid=Case(
+            When(Q(highest_bid__isnull=True) | Q(highest_bid__lt=amount), then=Value(amount, output_field=amount_field)),
+            default=F('highest_bid'),
+            output_field=amount_field,
+        ),
+        lowest_bid=Case(
+            When(Q(lowest_bid__isnull=True) | Q(lowest_bid__gt=amount), then=Value(amount, output_field=amount_field)),
+            default=F('lowest_bid'),
+            output_field=amount_field,
+        ),
+    )
+    if not updated:
+        refresh_event_stats(event_id)
+
+
+def bid_removed(event_id, amount):
+    stats = EventStats.objects.filter(event_id=event_id).values('highest_bid', 'lowest_bid').first()
+    if stats is None:
+        # The event itself is being deleted; its stats row is already gone.
+        return
+    if amount in (stats['highest_bid'], stats['lowest_bid']):
+        refresh_bid_stats(event_id)
+    else:
+        EventStats.objects.filter(event_id=event_id).update(bid_count=F('bid_count') - 1)
+
+
+def participant_added(event_id):
+    if not EventStats.objects.filter(event_id=event_id).update(participant_count=F('participant_count') + 1):
+        refresh_event_stats(event_id)
+
+
+def participant_removed(event_id):
+    EventStats.objects.filter(event_id=event_id).update(participant_count=F('participant_count') - 1)
+
+
+def item_added(event_id, quantity):
+    updated = EventStats.objects.filter(event_id=event_id).update(
+        item_count=F('item_count') + 1,
+        item_quantity=F('item_quantity') + quantity,
+    )
+    if not updated:
+        refresh_event_stats(event_id)
+
+
+def item_removed(event_id, quantity):
+    EventStats.objects.filter(event_id=event_id).update(
+        item_count=F('item_count') - 1,
+        item_quantity=F('item_quantity') - quantity,
+    )
+
+
+def item_quantity_changed(event_id, delta):
+    EventStats.objects.filter(event_id=event_id).update(item_quantity=F('item_quantity') + delta)
@@ -0,0 +1,139 @@
+"""
+Background tasks run by ``manage.py run_jobs``. See ``events.jobs``.
+"""
+import gzip
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Max, Q
+
+from . import snapshots
+from .jobs import task
+from .models import (
+    Event, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog, EventStats,
+    EventSnapshot,
+)
+
+AWARD_SCENARIO_NAME = 'Highest bids'
+
+# Children before parents, so no statement trips a foreign key or makes the
+# database cascade on its own. Only rows of the purged event are listed;
+# rows of other events that point at it are removed by _purge_foreign_rows.
+PURGE_ORDER = [
+    (Award, 'scenario__event_id'),
+    (Bid, 'event_id'),
+    (Participant, 'event_id'),
+    (Item, 'event_id'),
+    (Scenario, 'event_id'),
+    (Attachment, 'event_id'),
+    (Template, 'event_id'),
+    (EventRule, 'event_id'),
+    (EventLog, 'event_id'),
+    (EventStats, 'event_id'),
+    (EventSnapshot, 'event_id'),
+]
+
+
+@task('export_event')
+def export_event(context, event_id):
+    """Write the event and all of its rows to a JSON file in storage, copying its snapshot if it has one."""
+    snapshot = EventSnapshot.objects.filter(pk=event_id).values_list('export', flat=True).first()
+    if snapshot is not None:
+        body = gzip.decompress(snapshot)
+    else:
+        body = snapshots.render(snapshots.export_document(Event.objects.get(pk=event_id), context.progress))
+
+    context.progress(90, 'Writing file')
+    path = f"{settings.JOBS['EXPORT_DIR']}/event-{event_id}-job-{context.job.pk}.json"
+    name = default_storage.save(path, ContentFile(body))
+    return {'file': default_storage.url(name), 'size': default_storage.size(name)}
+
+
+@task('compute_awards')
+def compute_awards(context, event_id):
+    """
+    Award items to the highest bidders: participants who are not blocked are
+    ranked by their best regular bid, and the items, in id order, go to them
+    one per participant. The result replaces the awards of the event's
+    "Highest bids" scenario.
+    """
+    event = Event.objects.get(pk=event_id)
+    context.progress(0, 'Ranking bids')
+    ranking = list(
+        Bid.objects.filter(event=event, is_alternative=False, participant__blocked=False)
+        .values('participant_id').annotate(best=Max('amount')).order_by('-best', 'participant_id')
+    )
+    items = list(Item.objects.filter(event=event).order_by('id'))
+
+    context.progress(50, 'Writing awards')
+    with transaction.atomic():
+        scenario, _ = Scenario.objects.get_or_create(
+            event=event, name=AWARD_SCENARIO_NAME,
+            defaults={'description': 'Items awarded to the highest bidders.'},
+        )
+        scenario.awards.all().delete()
+        for item, bid in zip(items, ranking):
+            Award.objects.create(
+                scenario=scenario, participant_id=bid['participant_id'], item=item,
+                quantity=item.quantity, amount=bid['best'],
+            )
+    return {'scenario': scenario.pk, 'awards': min(len(items), len(ranking))}
+
+
+def _purge_foreign_rows(event_id):
+    """
+    Delete the awards and bids of other events that reference the event's
+    participants or items. They go through the ORM so that the signals keep
+    those events' stats, journal, snapshots and bid charts in step.
+    """
+    awards = Award.objects.filter(Q(participant__event_id=event_id) | Q(item__event_id=event_id))
+    bids = Bid.objects.filter(participant__event_id=event_id)
+    deleted = {}
+    for queryset in (awards.exclude(scenario__event_id=event_id), bids.exclude(event_id=event_id)):
+        with transaction.atomic():
+            for label, count in queryset.delete()[1].items():
+                name = label.rsplit('.', 1)[-1].lower()
+                deleted[name] = deleted.get(name, 0) + count
+    return deleted
+
+
+def _purge_rows(model, lookup, event_id, batch_size):
+    """Delete the event's rows of ``model`` in short statements, skipping the ORM collector and signals."""
+    queryset = model.objects.filter(**{lookup: event_id})
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        files = []
+        if model is Attachment:
+            files = list(Attachment.objects.filter(pk__in=ids).values_list('file', flat=True))
+        with transaction.atomic():
+            model.objects.filter(pk__in=ids)._raw_delete(queryset.db)
+            for name in files:
+                transaction.on_commit(lambda name=name: default_storage.delete(name))
+        deleted += len(ids)
+
+
+@task('purge_event')
+def purge_event(context, event_id, batch_size=None):
+    """
+    Remove a soft-deleted event and everything under it. The journal already
+    holds the event's tombstone, written when it was deleted.
+    """
+    batch_size = batch_size or settings.JOBS['PURGE_BATCH_SIZE']
+    deleted = _purge_foreign_rows(event_id)
+    for done, (model, lookup) in enumerate(PURGE_ORDER):
+        context.progress(done * 100 // (len(PURGE_ORDER) + 1), f'Deleting {model._meta.verbose_name_plural}')
+        name = model._meta.model_name
+        deleted[name] = deleted.get(name, 0) + _purge_rows(model, lookup, event_id, batch_size)
+    Event.all_objects.filter(pk=event_id, deleted_at__isnull=False)._raw_delete(Event.all_objects.db)
+    return deleted
+
+
+@task('build_snapshot')
+def build_snapshot(context, event_id):
+    snapshot = snapshots.build_snapshot(event_id)
+    return {'built': snapshot is not None}
@@ -0,0 +1,86 @@
+"""
+Test helpers for query budgets.
+
+Viewsets declare ``query_budget = {'list': 8, 'retrieve': 8}``. ``QueryBudgetTestMixin``
+calls every read endpoint registered on the router against two data sizes and
+fails when the query count grows with the data or exceeds the budget.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from eventManagementAPI.middleware import is_transaction_statement
+
+from .models import Event, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog
+from .urls import router
+
+
+def seed_events(owner, count, children=3):
+    """Create ``count`` events, each with ``children`` rows of every child model."""
+    start = timezone.now()
+    for n in range(count):
+        event = Event.objects.create(
+            name=f'Event {n}', description='Seeded event', owner=owner,
+            start_time=start, end_time=start + timedelta(days=1),
+        )
+        for c in range(children):
+            item = Item.objects.create(event=event, name=f'Item {c}', description='Seeded item', quantity=c + 1)
+            participant = Participant.objects.create(event=event, name=f'Participant {c}', contact_info='-')
+            scenario = Scenario.objects.create(event=event, name=f'Scenario {c}', description='-')
+            Bid.objects.create(event=event, participant=participant, amount=Decimal(c + 1))
+            Award.objects.create(scenario=scenario, participant=participant, item=item, quantity=1, amount=Decimal(1))
+            Attachment.objects.create(event=event, file=f'attachments/seed-{n}-{c}.txt')
+            Template.objects.create(event=event, name=f'Template {c}', rules={})
+            EventRule.objects.create(event=event, rule_name='min_bid', rule_value=str(c))
+            EventLog.objects.create(event=event, message=f'Log {c}')
+
+
+def read_endpoints():
+    """Yield ``(label, viewset, action, url)`` for the list and detail route of every registered viewset."""
+    for prefix, viewset, basename in router.registry:
+        yield f'{viewset.__name__}.list', viewset, 'list', f'/api/{prefix}/'
+        obj = viewset.queryset.model.objects.order_by('pk').first()
+        if obj is not None:
+            yield f'{viewset.__name__}.retrieve', viewset, 'retrieve', f'/api/{prefix}/{obj.pk}/'
+
+
+class QueryBudgetTestMixin:
+    """
+    Mix into a TestCase using an authenticated APIClient. Subclasses implement
+    ``seed(size)``, which must add data so the database holds ``size`` events.
+    """
+    small_size = 2
+    large_size = 6
+
+    def seed(self, size):
+        raise NotImplementedError
+
+    def count_queries(self):
+        counts = {}
+        for label, viewset, action, url in read_endpoints():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, f'{label} returned {response.status_code}')
+            queries = [q for q in context.captured_queries if not is_transaction_statement(q['sql'])]
+            counts[label] = (viewset, action, len(queries))
+        return counts
+
+    def test_query_budgets(self):
+        self.seed(self.small_size)
+        small = self.count_queries()
+        self.seed(self.large_size)
+        large = self.count_queries()
+
+        for label, (viewset, action, count) in large.items():
+            with self.subTest(endpoint=label):
+                self.assertEqual(
+                    count, small[label][2],
+                    f'{label} ran {small[label][2]} queries for {self.small_size} events '
+                    f'but {count} for {self.large_size}',
+                )
+                budget = getattr(viewset, 'query_budget', {}).get(action)
+                self.assertIsNotNone(budget, f'{viewset.__name__} declares no query budget for {action}')
+                self.assertLessEqual(count, budget, f'{label} exceeds its budget of {budget} queries')
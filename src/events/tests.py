@@ -1,3 +1,1137 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import zlib
+from argparse import Namespace
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.conf import settings
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ParseError, PermissionDenied
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from benchmarks import api as api_benchmark
+from eventManagementAPI import compression, schema as schema_module
+from eventManagementAPI.metrics import registry
+from eventManagementAPI.parsers import ORJSONParser
+from eventManagementAPI.renderers import ORJSONRenderer, msgpack, orjson
+from eventManagementAPI.middleware import CompressionMiddleware, SlowestProfiles, is_transaction_statement
+
+from .fast_serializers import compile_plan
+from .jobs import TASKS, Heartbeat, claim, enqueue, execute, requeue_stale, run_worker
+from .testing import QueryBudgetTestMixin, seed_events
+from .models import (
+    Attachment, Award, ChangeJournal, Event, EventRule, EventSnapshot, EventStats, Item, Participant, Bid, EventLog, Job,
+    Scenario, Template,
+)
+from .scheduler import CloseScheduler
+from .search import _fts5_available
+from .views import EventViewSet
+from .serializers import (
+    BidSerializer, EventLogSerializer, ItemSerializer, TemplateSerializer,
+    AttachmentSerializer, EventSerializer,
+)
+
+User = get_user_model()
+
+
+def create_event(owner, **kwargs):
+    start = timezone.now()
+    defaults = {
+        'name': 'Spring auction',
+        'description': 'Office supplies',
+        'start_time': start,
+        'end_time': start + timedelta(days=1),
+        'owner': owner,
+    }
+    defaults.update(kwargs)
+    return Event.objects.create(**defaults)
+
+
+class EventStatsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.event = create_event(self.owner)
+        self.participant = Participant.objects.create(event=self.event, name='P', contact_info='-')
+
+    def stats(self):
+        return EventStats.objects.get(event=self.event)
+
+    def bid(self, amount):
+        return Bid.objects.create(event=self.event, participant=self.participant, amount=Decimal(amount))
+
+    def test_bids_move_the_extremes(self):
+        low, middle, high = self.bid(5), self.bid(10), self.bid(20)
+        stats = self.stats()
+        self.assertEqual((stats.bid_count, stats.lowest_bid, stats.highest_bid), (3, Decimal(5), Decimal(20)))
+
+        high.amount = Decimal(8)
+        high.save()
+        self.assertEqual(self.stats().highest_bid, Decimal(10))
+        low.amount = Decimal(50)
+        low.save()
+        stats = self.stats()
+        self.assertEqual((stats.lowest_bid, stats.highest_bid), (Decimal(8), Decimal(50)))
+
+        low.delete()
+        stats = self.stats()
+        self.assertEqual((stats.bid_count, stats.lowest_bid, stats.highest_bid), (2, Decimal(8), Decimal(10)))
+        middle.delete()
+        high.delete()
+        stats = self.stats()
+        self.assertEqual((stats.bid_count, stats.lowest_bid, stats.highest_bid), (0, None, None))
+
+    def test_participant_and_item_changes_are_counted(self):
+        item = Item.objects.create(event=self.event, name='Desk', description='-', quantity=4)
+        Item.objects.create(event=self.event, name='Chair', description='-', quantity=2)
+        stats = self.stats()
+        self.assertEqual((stats.participant_count, stats.item_count, stats.item_quantity), (1, 2, 6))
+
+        item.quantity = 10
+        item.save()
+        self.assertEqual(self.stats().item_quantity, 12)
+        item.delete()
+        self.participant.delete()
+        stats = self.stats()
+        self.assertEqual((stats.participant_count, stats.item_count, stats.item_quantity), (0, 1, 2))
+
+    def test_saves_and_their_stats_updates_commit_together(self):
+        with mock.patch('events.stats.bid_added', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.bid(5)
+        self.assertFalse(Bid.objects.filter(event=self.event).exists())
+        self.assertEqual(self.stats().bid_count, 0)
+
+    def test_rebuild_repairs_drifted_rows(self):
+        self.bid(7)
+        Item.objects.create(event=self.event, name='Desk', description='-', quantity=3)
+        EventStats.objects.filter(event=self.event).update(
+            bid_count=99, highest_bid=None, participant_count=0, item_count=5, item_quantity=0,
+        )
+        call_command('rebuild_event_stats', stdout=StringIO())
+        stats = self.stats()
+        self.assertEqual(
+            (stats.bid_count, stats.highest_bid, stats.lowest_bid, stats.participant_count, stats.item_count,
+             stats.item_quantity),
+            (1, Decimal(7), Decimal(7), 1, 1, 3),
+        )
+
+
+class FastSerializerTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.event = create_event(cls.owner)
+        participant = Participant.objects.create(event=cls.event, name='Supplier', contact_info='s@example.com')
+        for amount in ('10', '12.5', '99999999.99', '0.01'):
+            Bid.objects.create(event=cls.event, participant=participant, amount=Decimal(amount))
+        EventLog.objects.create(event=cls.event, message='Bidding opened — «lot 1»')
+        EventLog.objects.create(event=cls.event, message='')
+
+    def assertSameOutput(self, serializer_class, queryset):
+        plan = compile_plan(serializer_class)
+        self.assertIsNotNone(plan)
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        actual = JSONRenderer().render(plan.to_representation(plan.queryset(queryset)))
+        self.assertEqual(actual, expected)
+
+    def test_bid_output_matches_model_serializer(self):
+        self.assertSameOutput(BidSerializer, Bid.objects.order_by('id'))
+
+    def test_event_log_output_matches_model_serializer(self):
+        self.assertSameOutput(EventLogSerializer, EventLog.objects.order_by('id'))
+
+    def test_serializers_needing_instances_have_no_plan(self):
+        self.assertIsNone(compile_plan(AttachmentSerializer))
+        self.assertIsNone(compile_plan(EventSerializer))
+        self.assertIsNotNone(compile_plan(ItemSerializer))
+        self.assertIsNotNone(compile_plan(TemplateSerializer))
+
+    def test_list_endpoint_uses_plan(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.get('/api/bids/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), BidSerializer(Bid.objects.all(), many=True).data)
+
+
+@skipUnless(orjson, 'orjson is not installed')
+class RendererTests(TestCase):
+    client_class = APIClient
+
+    def test_orjson_output_matches_json_renderer(self):
+        payload = {
+            'name': 'Caf\u00e9 \u2028 night', 'amount': Decimal('1.50'), 'missing': None, 3: [1, 2.5, True],
+            'at': datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc), 'day': date(2024, 5, 1),
+        }
+        for context in ({}, {'indent': 2}, {'indent': 4}):
+            self.assertEqual(
+                ORJSONRenderer().render(payload, renderer_context=context),
+                JSONRenderer().render(payload, renderer_context=context),
+            )
+
+    def test_non_finite_floats_follow_strict_json(self):
+        with self.assertRaises(ValueError):
+            ORJSONRenderer().render({'score': [float('nan')]})
+        with mock.patch.object(ORJSONRenderer, 'strict', False), mock.patch.object(JSONRenderer, 'strict', False):
+            payload = {'score': float('inf'), 'none': None}
+            self.assertEqual(ORJSONRenderer().render(payload), JSONRenderer().render(payload))
+
+    def test_orjson_parser_matches_json_parser(self):
+        body = '{"name": "Caf\u00e9", "amount": 1.5, "tags": [1, null]}'.encode()
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        for invalid in (b'{"a": ', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(BytesIO(invalid))
+
+    @skipUnless(msgpack, 'msgpack is not installed')
+    def test_message_pack_requests_and_responses(self):
+        owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(owner)
+        event = create_event(owner)
+        body = msgpack.packb({'event': event.pk, 'name': 'Lamp', 'description': '-', 'quantity': 2})
+        response = self.client.post(
+            '/api/items/', body, content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        item = msgpack.unpackb(response.content)
+        self.assertEqual((item['name'], item['quantity']), ('Lamp', 2))
+        detail = self.client.get(f'/api/events/{event.pk}/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(msgpack.unpackb(detail.content)['start_time'], self.client.get(f'/api/events/{event.pk}/').json()['start_time'])
+
+
+class SearchTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.toner = create_event(cls.owner, name='Toner auction', description='Printer toner, paper trays')
+        cls.paper = create_event(cls.owner, name='Paper auction', description='Recycled paper and envelopes')
+        Item.objects.create(event=cls.paper, name='Envelopes', description='C5 envelopes', quantity=100)
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+
+    def test_events_are_ranked_by_relevance(self):
+        response = self.client.get('/api/events/', {'q': 'paper'})
+        self.assertEqual([event['id'] for event in response.json()], [self.paper.id, self.toner.id])
+
+    def test_all_words_must_match_and_last_word_is_a_prefix(self):
+        response = self.client.get('/api/events/', {'q': 'printer ton'})
+        self.assertEqual([event['id'] for event in response.json()], [self.toner.id])
+
+    def test_search_follows_updates(self):
+        Item.objects.filter(event=self.paper).update(description='Padded mailers')
+        self.assertEqual(self.client.get('/api/items/', {'q': 'mailers'}).json()[0]['name'], 'Envelopes')
+        self.assertEqual(self.client.get('/api/items/', {'q': 'C5'}).json(), [])
+
+    def test_filter_and_rank_share_one_match(self):
+        if not _fts5_available(connection):
+            self.skipTest('SQLite FTS5 only')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/items/', {'q': 'envelopes'})
+        self.assertEqual(len(response.json()), 1)
+        self.assertEqual(sum(query['sql'].count(' MATCH ') for query in context.captured_queries), 1)
+
+
+class TimeRangeTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.day = datetime(2024, 6, 3, tzinfo=dt_timezone.utc)
+
+        def hours(n):
+            return cls.day + timedelta(hours=n)
+        cls.morning = create_event(cls.owner, start_time=hours(9), end_time=hours(12))
+        cls.lunch = create_event(cls.owner, start_time=hours(11), end_time=hours(14))
+        cls.overnight = create_event(cls.owner, start_time=hours(22), end_time=hours(26))
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+
+    def hours(self, n):
+        return self.day + timedelta(hours=n)
+
+    def ids(self, **params):
+        return sorted(event['id'] for event in self.client.get('/api/events/', params).json())
+
+    def test_range_filters(self):
+        self.assertEqual(self.ids(active_at=self.hours(11).isoformat()), [self.morning.id, self.lunch.id])
+        self.assertEqual(self.ids(active_at=self.hours(12).isoformat()), [self.lunch.id])
+        self.assertEqual(self.ids(overlaps=self.morning.id), [self.lunch.id])
+        self.assertEqual(self.ids(overlaps=0), [])
+        self.assertEqual(self.ids(starts_after=self.hours(10).isoformat(), ends_before=self.hours(14).isoformat()),
+                         [self.lunch.id])
+
+    def test_calendar_buckets(self):
+        response = self.client.get('/api/events/calendar/', {
+            'start': self.day.isoformat(), 'end': (self.day + timedelta(days=2)).isoformat(), 'bucket': 'day',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(bucket['starting'], bucket['active']) for bucket in response.json()['buckets']],
+            [(3, 3), (0, 1)],
+        )
+        response = self.client.get('/api/events/calendar/', {
+            'start': self.hours(11).isoformat(), 'end': self.hours(14).isoformat(), 'bucket': 'hour',
+        })
+        self.assertEqual(
+            [(bucket['starting'], bucket['active']) for bucket in response.json()['buckets']],
+            [(1, 2), (0, 1), (0, 1)],
+        )
+
+    def test_calendar_rejects_oversized_windows(self):
+        response = self.client.get('/api/events/calendar/', {
+            'start': self.day.isoformat(), 'end': (self.day + timedelta(days=365)).isoformat(), 'bucket': 'hour',
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class PerformanceMonitoringTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        registry.reset()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+        create_event(self.owner)
+
+    def test_metrics_expose_latency_queries_and_size(self):
+        self.client.get('/api/events/')
+        self.client.force_login(User.objects.create_user('staff', 'staff@example.com', 'password', is_staff=True))
+        metrics = self.client.get('/metrics').content.decode()
+        labels = '{view="event-list",method="GET"'
+        self.assertIn('http_requests_total{view="event-list",method="GET",status="200"} 1', metrics)
+        for series in ('http_request_duration_seconds_bucket', 'http_request_db_queries_count',
+                       'http_request_db_seconds_total', 'http_response_size_bytes_sum'):
+            self.assertIn(series + labels, metrics)
+
+    def test_metrics_need_staff_or_the_token(self):
+        self.client.force_login(self.owner)
+        with override_settings(PERFORMANCE_MONITORING={**settings.PERFORMANCE_MONITORING, 'METRICS_TOKEN': None}):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+        config = {**settings.PERFORMANCE_MONITORING, 'METRICS_TOKEN': 's3cret'}
+        with override_settings(PERFORMANCE_MONITORING=config):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+            self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+    def test_server_timing_only_when_enabled(self):
+        with override_settings(PERFORMANCE_MONITORING={**settings.PERFORMANCE_MONITORING, 'SERVER_TIMING': False}):
+            self.assertNotIn('Server-Timing', self.client.get('/api/events/'))
+
+    @override_settings(PERFORMANCE_MONITORING={**settings.PERFORMANCE_MONITORING, 'SERVER_TIMING': True})
+    def test_server_timing_reports_app_db_and_cache(self):
+        timing = self.client.get('/api/events/')['Server-Timing']
+        self.assertRegex(timing, r'app;dur=[\d.]+, db;dur=[\d.]+;desc="\d+ queries", cache;desc=')
+
+    def test_only_the_slowest_profiles_are_kept(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        profiles = SlowestProfiles(directory.name, limit=2)
+
+        def write(path):
+            open(path + '.prof', 'w').close()
+            return path + '.prof'
+
+        for seconds in (0.1, 0.3, 0.2, 0.05):
+            if profiles.qualifies(seconds):
+                profiles.keep(seconds, 'view', write)
+        self.assertEqual(sorted(name.split('ms-')[0] for name in os.listdir(directory.name)), ['0000200.0', '0000300.0'])
+
+    def test_sampled_requests_are_profiled(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        config = {**settings.PERFORMANCE_MONITORING, 'PROFILE_SAMPLE_RATE': 1.0, 'PROFILE_SLOWEST': 2,
+                  'PROFILE_DIR': directory.name, 'PROFILER': 'cprofile'}
+        with override_settings(PERFORMANCE_MONITORING=config):
+            for _ in range(3):
+                self.client.get('/api/events/')
+        files = os.listdir(directory.name)
+        self.assertEqual(len(files), 2)
+        self.assertTrue(all('-event-list-' in name and name.endswith('.prof') for name in files))
+
+
+class ChangesTests(TestCase):
+    client_class = APIClient
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        cls.event = create_event(cls.owner)
+        cls.participant = Participant.objects.create(event=cls.event, name='Supplier', contact_info='s@example.com')
+
+    def setUp(self):
+        self.client.force_authenticate(self.owner)
+
+    def sync(self, since):
+        response = self.client.get(f'/api/events/{self.event.id}/changes/', {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_only_changes_after_the_cursor_are_returned(self):
+        cursor = self.sync(0)['cursor']
+        bid = Bid.objects.create(event=self.event, participant=self.participant, amount=Decimal('5'))
+        bid.amount = Decimal('6')
+        bid.save()
+        doomed = EventLog.objects.create(event=self.event, message='temporary')
+        doomed_id = doomed.id
+        doomed.delete()
+
+        page = self.sync(cursor)
+        self.assertEqual(
+            [(change['model'], change['id'], change['action']) for change in page['changes']],
+            [('bid', bid.id, 'created'), ('log', doomed_id, 'deleted')],
+        )
+        self.assertEqual(page['changes'][0]['data']['amount'], '6.00')
+        self.assertIsNone(page['changes'][1]['data'])
+        self.assertEqual(self.sync(page['cursor'])['changes'], [])
+
+    def test_recent_entries_are_held_back_until_they_settle(self):
+        cursor = self.sync(0)['cursor']
+        bid = Bid.objects.create(event=self.event, participant=self.participant, amount=Decimal('5'))
+        with override_settings(CHANGE_JOURNAL_COMMIT_LAG=60):
+            self.assertEqual(self.sync(cursor), {'cursor': cursor, 'has_more': False, 'changes': []})
+        ChangeJournal.objects.filter(object_id=bid.id, model='bid').update(timestamp=timezone.now() - timedelta(minutes=2))
+        with override_settings(CHANGE_JOURNAL_COMMIT_LAG=60):
+            self.assertEqual([change['id'] for change in self.sync(cursor)['changes']], [bid.id])
+
+    def test_cursors_expire_once_the_event_was_trimmed(self):
+        cursor = self.sync(0)['cursor']
+        EventLog.objects.create(event=self.event, message='later')
+        ChangeJournal.objects.filter(event_id=self.event.id, id__lte=cursor).delete()
+        response = self.client.get(f'/api/events/{self.event.id}/changes/', {'since': cursor - 1})
+        self.assertEqual(response.status_code, 410)
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+
+    def seed(self, size):
+        seed_events(self.owner, size - Event.objects.count())
+
+    def test_filtered_event_list_stays_within_budget(self):
+        self.seed(self.small_size)
+        counts = {}
+        for params in ({}, {'overlaps': Event.objects.first().pk}, {'active_at': timezone.now().isoformat()}):
+            with CaptureQueriesContext(connection) as context:
+                self.assertEqual(self.client.get('/api/events/', params).status_code, 200)
+            counts[tuple(params)] = len([q for q in context.captured_queries if not is_transaction_statement(q['sql'])])
+        self.assertEqual(len(set(counts.values())), 1, counts)
+        self.assertLessEqual(counts[()], EventViewSet.query_budget['list'])
+
+
+class SchemaFileTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(OPENAPI_SCHEMA_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(schema_module._schema_files.clear)
+        schema_module._schema_files.clear()
+        schema_module.build_schema_files()
+
+    def test_schema_is_served_from_the_built_file_with_etag_and_gzip(self):
+        response = self.client.get('/api/schema/', {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), schema_module.schema_path('json').read_bytes())
+
+        cached = self.client.get('/api/schema/', {'format': 'json'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        yaml = self.client.get('/api/schema/')
+        self.assertTrue(yaml.content.startswith(b'openapi:'))
+
+    def test_refused_gzip_is_not_sent(self):
+        response = self.client.get('/api/schema/', {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response.content, schema_module.schema_path('json').read_bytes())
+
+    def test_annotations_are_applied_to_the_built_schema(self):
+        schema = json.loads(schema_module.schema_path('json').read_bytes())
+        operation = schema['paths']['/api/events/{id}/bids/timeseries/']['get']
+        self.assertEqual(operation['tags'], ['Event'])
+
+    def test_workers_do_not_import_drf_spectacular(self):
+        code = (
+            'import sys, django; django.setup()\n'
+            'from django.urls import get_resolver; get_resolver()._populate()\n'
+            "print(' '.join(sorted(m for m in sys.modules if m.startswith('drf_spectacular'))))\n"
+        )
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'eventManagementAPI.settings'}
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        # Only the app config, which INSTALLED_APPS loads.
+        self.assertLessEqual(set(result.stdout.split()), {'drf_spectacular', 'drf_spectacular.apps', 'drf_spectacular.checks'})
+
+
+class JobTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+        self.event = create_event(self.owner)
+        self.items = [Item.objects.create(event=self.event, name=f'Item {n}', description='-', quantity=n + 1)
+                      for n in range(2)]
+        for name, amount in (('low', '10'), ('high', '30'), ('blocked', '50')):
+            participant = Participant.objects.create(event=self.event, name=name, contact_info='-',
+                                                     blocked=name == 'blocked')
+            Bid.objects.create(event=self.event, participant=participant, amount=Decimal(amount))
+
+    def start(self, action):
+        response = self.client.post(f'/api/events/{self.event.pk}/{action}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], Job.QUEUED)
+        run_worker(processes=0, burst=True)
+        return self.client.get(response['Location']).json()
+
+    def test_export_job_writes_the_event_to_a_file(self):
+        job = self.start('export')
+        self.assertEqual(job['status'], Job.SUCCEEDED, job['error'])
+        self.assertEqual(job['progress'], 100)
+        self.assertTrue(job['result']['file'].endswith('.json'))
+        self.assertGreater(job['result']['size'], 0)
+
+    def test_compute_awards_job_awards_items_to_the_highest_bidders(self):
+        job = self.start('compute-awards')
+        self.assertEqual(job['status'], Job.SUCCEEDED, job['error'])
+        awards = self.event.scenarios.get(pk=job['result']['scenario']).awards.order_by('item_id')
+        self.assertEqual(
+            [(award.item_id, award.participant.name, award.amount) for award in awards],
+            [(self.items[0].pk, 'high', Decimal('30')), (self.items[1].pk, 'low', Decimal('10'))],
+        )
+
+    def claimed_export(self):
+        job = enqueue('export_event', owner=self.owner, event_id=self.event.pk)
+        self.assertEqual(claim(1), [job.pk])
+        return Job.objects.get(pk=job.pk)
+
+    def test_heartbeats_keep_long_jobs_from_going_stale(self):
+        job = self.claimed_export()
+        Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(Heartbeat(job, interval=1).beat())
+        self.assertEqual(requeue_stale(stale_after=60), (0, 0))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.RUNNING)
+
+    def test_requeued_runs_do_not_overwrite_the_newer_attempt(self):
+        job = self.claimed_export()
+
+        def export_while_requeued(context, event_id):
+            # The job went stale and another worker claimed it while this run was busy.
+            Job.objects.filter(pk=job.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+            requeue_stale(stale_after=60)
+            claim(1)
+            context.progress(50)
+            return {'file': 'stale.json'}
+
+        with mock.patch.dict(TASKS, export_event=export_while_requeued):
+            self.assertIsNone(execute(job.pk))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.progress, job.result), (Job.RUNNING, 2, 0, None))
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.now = timezone.now()
+
+    def ending(self, delta, status=Event.PUBLISHED):
+        return create_event(self.owner, status=status, start_time=self.now - timedelta(days=1),
+                            end_time=self.now + delta)
+
+    def test_due_events_are_closed_and_journaled(self):
+        ended = self.ending(timedelta(minutes=-5))
+        running = self.ending(timedelta(minutes=5))
+        draft = self.ending(timedelta(minutes=-5), status=Event.DRAFT)
+        scheduler = CloseScheduler(compute_awards=True)
+
+        self.assertEqual(scheduler.tick(self.now), [ended.pk])
+        self.assertEqual(Event.objects.get(pk=ended.pk).status, Event.CLOSED)
+        self.assertEqual(Event.objects.get(pk=draft.pk).status, Event.DRAFT)
+        self.assertTrue(ChangeJournal.objects.filter(event_id=ended.pk, action=ChangeJournal.UPDATED).exists())
+        self.assertEqual(list(Job.objects.filter(task='compute_awards').values_list('event_id', flat=True)), [ended.pk])
+
+        self.assertEqual(scheduler.tick(self.now + timedelta(minutes=10)), [running.pk])
+
+    def test_paused_events_are_not_closed(self):
+        paused = self.ending(timedelta(minutes=-5), status=Event.PAUSED)
+        scheduler = CloseScheduler()
+
+        self.assertEqual(scheduler.tick(self.now), [])
+        self.assertEqual(Event.objects.get(pk=paused.pk).status, Event.PAUSED)
+
+    def test_extended_events_are_not_closed_from_a_stale_heap(self):
+        event = self.ending(timedelta(minutes=5))
+        scheduler = CloseScheduler()
+        scheduler.rebuild(self.now)
+        Event.objects.filter(pk=event.pk).update(end_time=self.now + timedelta(hours=2))
+
+        self.assertEqual(scheduler.close_due(self.now + timedelta(minutes=10)), [])
+        self.assertEqual(Event.objects.get(pk=event.pk).status, Event.PUBLISHED)
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'login': '3/min', 'login_username': '2/min', 'bid_user': '2/min', 'bid_event': None},
+})
+class ThrottlingTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.event = create_event(self.owner)
+        self.participant = Participant.objects.create(event=self.event, name='Ann', contact_info='-')
+
+    def test_bids_are_limited_per_user_and_then_rejected_before_authentication(self):
+        self.client.force_authenticate(self.owner)
+        payload = {'event': self.event.pk, 'participant': self.participant.pk, 'amount': '1.00'}
+        codes = [self.client.post('/api/bids/', payload, format='json').status_code for _ in range(3)]
+        self.assertEqual(codes, [201, 201, 429])
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post('/api/bids/', payload, format='json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(len(context.captured_queries), 0)
+        self.assertEqual(self.client.get('/api/bids/').status_code, 200)
+
+    def test_login_attempts_are_limited_per_username(self):
+        attempts = [
+            self.client.post('/auth/login/', {'username': 'owner', 'password': 'wrong'}, format='json').status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(attempts, [401, 401, 429])
+
+    def test_failed_logins_elsewhere_do_not_lock_the_owner_out(self):
+        for _ in range(2):
+            self.client.post('/auth/login/', {'username': 'owner', 'password': 'wrong'},
+                             format='json', REMOTE_ADDR='10.0.0.1')
+        response = self.client.post('/auth/login/', {'username': 'owner', 'password': 'password'},
+                                    format='json', REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    def test_forwarded_addresses_are_trusted_only_behind_configured_proxies(self):
+        attempts = [
+            self.client.post('/auth/login/', {'username': f'user{n}', 'password': 'wrong'}, format='json',
+                             HTTP_X_FORWARDED_FOR=f'10.0.0.{n}').status_code
+            for n in range(4)
+        ]
+        self.assertEqual(attempts, [401, 401, 401, 429])
+
+
+class IdempotencyTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+        self.event = create_event(self.owner)
+        self.participant = Participant.objects.create(event=self.event, name='Ann', contact_info='-')
+
+    def post_bid(self, key, amount='1.00'):
+        payload = {'event': self.event.pk, 'participant': self.participant.pk, 'amount': amount}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/bids/', payload, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retries_replay_the_first_response(self):
+        first = self.post_bid('retry-1')
+        retry = self.post_bid('retry-1')
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Bid.objects.count(), 1)
+
+        self.assertEqual(self.post_bid('retry-2').status_code, 201)
+        self.assertEqual(Bid.objects.count(), 2)
+
+    def test_reusing_a_key_for_another_request_is_rejected(self):
+        self.post_bid('retry-1')
+        self.assertEqual(self.post_bid('retry-1', amount='2.00').status_code, 422)
+
+    def test_duplicates_of_a_running_request_conflict_without_waiting(self):
+        digest = hashlib.sha256(b'retry-1').hexdigest()
+        cache.add(f'idempotency:{self.owner.pk}:{digest}:lock', 1)
+        with mock.patch('time.sleep') as sleep:
+            response = self.post_bid('retry-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response['Retry-After'], str(settings.IDEMPOTENCY['RETRY_AFTER']))
+        sleep.assert_not_called()
+
+    def test_retries_of_client_errors_replay_without_waiting(self):
+        payload = {'event': self.event.pk, 'participant': self.participant.pk, 'amount': 'lots'}
+        # on_commit callbacks never run here, as when the request's transaction rolls back.
+        with self.captureOnCommitCallbacks(execute=False):
+            first = self.client.post('/api/bids/', payload, format='json', HTTP_IDEMPOTENCY_KEY='bad-1')
+            retry = self.client.post('/api/bids/', payload, format='json', HTTP_IDEMPOTENCY_KEY='bad-1')
+        self.assertEqual(first.status_code, 400)
+        self.assertEqual(retry.status_code, 400)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+
+
+class DeleteTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+
+    def test_delete_hides_the_event_and_purges_it_in_the_background(self):
+        seed_events(self.owner, 2)
+        doomed, kept = Event.objects.order_by('pk')
+        attachment = Attachment.objects.filter(event=doomed).first()
+        attachment.file.save('doomed.txt', ContentFile(b'bye'))
+
+        response = self.client.delete(f'/api/events/{doomed.pk}/')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get(f'/api/events/{doomed.pk}/').status_code, 404)
+        self.assertTrue(Event.all_objects.filter(pk=doomed.pk).exists())
+        for url in ('/api/items/', '/api/bids/', '/api/participants/', '/api/logs/'):
+            self.assertEqual({row['event'] for row in self.client.get(url).json()}, {kept.pk}, url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            run_worker(processes=0, burst=True)
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+        self.assertFalse(Event.all_objects.filter(pk=doomed.pk).exists())
+        self.assertFalse(default_storage.exists(attachment.file.name))
+        for model in (Item, Participant, Bid, Scenario, Attachment, EventLog, EventStats):
+            self.assertFalse(model.objects.filter(event_id=doomed.pk).exists(), model.__name__)
+            self.assertTrue(model.objects.filter(event_id=kept.pk).exists(), model.__name__)
+        self.assertFalse(Award.objects.filter(scenario__event_id=doomed.pk).exists())
+        self.assertTrue(ChangeJournal.objects.filter(
+            event_id=doomed.pk, model='event', action=ChangeJournal.DELETED,
+        ).exists())
+
+    def test_purging_removes_rows_of_other_events_through_their_signals(self):
+        seed_events(self.owner, 2)
+        doomed, kept = Event.objects.order_by('pk')
+        stray = Bid.objects.create(
+            event=kept, participant=Participant.objects.filter(event=doomed).first(), amount=Decimal('999'),
+        )
+        award = Award.objects.create(
+            scenario=Scenario.objects.filter(event=kept).first(), item=Item.objects.filter(event=doomed).first(),
+            participant=Participant.objects.filter(event=kept).first(), quantity=1, amount=Decimal('1'),
+        )
+        bids = Bid.objects.filter(event=kept).count()
+        self.assertEqual(EventStats.objects.get(event=kept).highest_bid, Decimal('999'))
+
+        self.client.delete(f'/api/events/{doomed.pk}/')
+        with self.captureOnCommitCallbacks(execute=True):
+            run_worker(processes=0, burst=True)
+        self.assertEqual(Job.objects.get().status, Job.SUCCEEDED)
+        self.assertFalse(Bid.objects.filter(pk=stray.pk).exists())
+        self.assertFalse(Award.objects.filter(pk=award.pk).exists())
+        stats = EventStats.objects.get(event=kept)
+        self.assertEqual(stats.bid_count, bids - 1)
+        self.assertLess(stats.highest_bid, Decimal('999'))
+        journaled = ChangeJournal.objects.filter(event_id=kept.pk, action=ChangeJournal.DELETED)
+        self.assertEqual(
+            sorted(journaled.values_list('model', 'object_id')), sorted([('award', award.pk), ('bid', stray.pk)]),
+        )
+
+
+class SnapshotTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+        seed_events(self.owner, 1)
+        self.event = Event.objects.get()
+
+    def freeze(self):
+        self.client.post(f'/api/events/{self.event.pk}/stop/')
+        run_worker(processes=0, burst=True)
+
+    def test_frozen_events_are_served_from_their_snapshot(self):
+        live = self.client.get(f'/api/events/{self.event.pk}/').json()
+        self.freeze()
+        self.assertTrue(EventSnapshot.objects.filter(pk=self.event.pk).exists())
+        first = self.client.get(f'/api/events/{self.event.pk}/')
+        self.assertTrue(live['attachments'][0]['file'].startswith('http://testserver/'))
+        self.assertEqual(first.json(), {**live, 'status': 'stopped'})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/events/{self.event.pk}/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(len([q for q in context.captured_queries if not is_transaction_statement(q['sql'])]), 1)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), {**live, 'status': 'stopped'})
+
+        etag = response['ETag']
+        for if_none_match in (etag, f'"other", W/{etag}', '*'):
+            cached = self.client.get(f'/api/events/{self.event.pk}/', HTTP_IF_NONE_MATCH=if_none_match)
+            self.assertEqual(cached.status_code, 304, if_none_match)
+        # A tag that merely contains the snapshot's is a different tag.
+        self.assertEqual(
+            self.client.get(f'/api/events/{self.event.pk}/', HTTP_IF_NONE_MATCH=f'"x{etag[1:]}').status_code, 200,
+        )
+
+    def test_snapshots_follow_the_host_they_are_read_from(self):
+        self.freeze()
+        self.client.get(f'/api/events/{self.event.pk}/')
+        other = self.client.get(f'/api/events/{self.event.pk}/', HTTP_HOST='api.example.com').json()
+        self.assertTrue(other['attachments'][0]['file'].startswith('http://api.example.com/'))
+
+        refused = self.client.get(f'/api/events/{self.event.pk}/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', refused)
+        self.assertEqual(json.loads(refused.content)['status'], 'stopped')
+
+    def test_reopening_or_editing_rows_drops_the_snapshot(self):
+        self.freeze()
+        EventLog.objects.create(event=self.event, message='late note')
+        self.assertFalse(EventSnapshot.objects.filter(pk=self.event.pk).exists())
+        run_worker(processes=0, burst=True)
+        self.assertIn('late note', self.client.get(f'/api/events/{self.event.pk}/').content.decode())
+
+        self.client.post(f'/api/events/{self.event.pk}/reopen/')
+        run_worker(processes=0, burst=True)
+        self.assertFalse(EventSnapshot.objects.filter(pk=self.event.pk).exists())
+
+    def test_writes_to_live_events_do_not_delete_snapshots(self):
+        with CaptureQueriesContext(connection) as context:
+            EventLog.objects.create(event=self.event, message='note')
+        deletes = [q['sql'] for q in context.captured_queries if q['sql'].startswith('DELETE')]
+        self.assertEqual(deletes, [])
+
+    def test_snapshot_reads_run_the_object_permission_checks(self):
+        self.freeze()
+        with mock.patch.object(
+            EventViewSet, 'check_object_permissions', side_effect=PermissionDenied,
+        ) as check:
+            response = self.client.get(f'/api/events/{self.event.pk}/')
+        self.assertEqual(response.status_code, 403)
+        check.assert_called_once()
+
+
+class CloneTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+        seed_events(self.owner, 1)
+        self.event = Event.objects.get()
+
+    def children(self, event):
+        return {
+            'items': list(Item.objects.filter(event=event).order_by('pk').values_list('name', 'quantity')),
+            'rules': list(EventRule.objects.filter(event=event).order_by('pk').values_list('rule_name', 'rule_value')),
+            'scenarios': list(Scenario.objects.filter(event=event).order_by('pk').values_list('name', flat=True)),
+        }
+
+    def test_clone_copies_the_graph_into_a_new_draft(self):
+        start = self.event.start_time + timedelta(days=7)
+        response = self.client.post(f'/api/events/{self.event.pk}/clone/', {
+            'name': 'Next week', 'start_time': start.isoformat(), 'include_participants': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        clone = Event.objects.get(pk=response.json()['id'])
+        self.assertEqual((clone.name, clone.status, clone.owner), ('Next week', Event.DRAFT, self.owner))
+        self.assertEqual(clone.end_time - clone.start_time, self.event.end_time - self.event.start_time)
+        self.assertEqual(self.children(clone), self.children(self.event))
+        self.assertEqual(Participant.objects.filter(event=clone).count(), 3)
+        self.assertFalse(Bid.objects.filter(event=clone).exists())
+
+        stats = EventStats.objects.get(event=clone)
+        self.assertEqual((stats.item_count, stats.item_quantity, stats.participant_count), (3, 6, 3))
+        changes = self.client.get(f'/api/events/{clone.pk}/changes/').json()['changes']
+        self.assertEqual(len(changes), 1 + 3 + 3 + 3 + 3)
+
+    def test_instantiate_applies_the_template_rules(self):
+        template = Template.objects.create(event=self.event, name='Weekly', rules={'min_bid': 10, 'currency': 'EUR'})
+        response = self.client.post(f'/api/templates/{template.pk}/instantiate/', {}, format='json')
+        self.assertEqual(response.status_code, 201)
+        event = Event.objects.get(pk=response.json()['id'])
+        self.assertEqual(event.name, 'Weekly')
+        self.assertEqual(Item.objects.filter(event=event).count(), 3)
+        self.assertFalse(Participant.objects.filter(event=event).exists())
+        self.assertEqual(
+            sorted(EventRule.objects.filter(event=event).values_list('rule_name', 'rule_value')),
+            [('currency', 'EUR'), ('min_bid', '10')],
+        )
+
+        empty = Template.objects.create(name='Blank', rules={})
+        self.assertEqual(self.client.post(f'/api/templates/{empty.pk}/instantiate/', {}, format='json').status_code, 400)
+
+    def test_templates_without_a_live_event_start_empty(self):
+        deleted = Template.objects.create(event=self.event, name='Gone', rules={})
+        Event.objects.filter(pk=self.event.pk).update(deleted_at=timezone.now())
+        # Templates of deleted events are hidden until the purge removes them.
+        self.assertEqual(self.client.post(f'/api/templates/{deleted.pk}/instantiate/', {}, format='json').status_code, 404)
+
+        template = Template.objects.create(name='Weekly', rules={'min_bid': 10})
+        url = f'/api/templates/{template.pk}/instantiate/'
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start_time and end_time are required', str(response.json()))
+
+        start = timezone.now() + timedelta(days=1)
+        response = self.client.post(url, {'start_time': start, 'end_time': start + timedelta(hours=2)}, format='json')
+        self.assertEqual(response.status_code, 201)
+        event = Event.objects.get(pk=response.json()['id'])
+        self.assertFalse(Item.objects.filter(event=event).exists())
+        self.assertEqual(list(EventRule.objects.filter(event=event).values_list('rule_name', 'rule_value')),
+                         [('min_bid', '10')])
+
+
+class BidTimeseriesTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+        self.event = create_event(self.owner)
+        self.participant = Participant.objects.create(event=self.event, name='P', contact_info='-')
+
+    def bid(self, amount, minutes_ago):
+        bid = Bid.objects.create(event=self.event, participant=self.participant, amount=Decimal(amount))
+        Bid.objects.filter(pk=bid.pk).update(timestamp=timezone.now() - timedelta(minutes=minutes_ago))
+        return bid
+
+    def series(self):
+        response = self.client.get(f'/api/events/{self.event.pk}/bids/timeseries/', {'bucket': '1m'})
+        self.assertEqual(response.status_code, 200)
+        return [(b['open'], b['high'], b['low'], b['close'], b['count']) for b in response.json()['buckets']]
+
+    def test_buckets_hold_ohlc_and_ended_ones_are_cached(self):
+        bids = [self.bid(amount, minutes_ago=10) for amount in (10, 30, 5, 20)]
+        self.bid(40, minutes_ago=5)
+        self.assertEqual(self.series(), [('10.00', '30.00', '5.00', '20.00', 4), ('40.00', '40.00', '40.00', '40.00', 1)])
+
+        # Ended buckets come from the cache, so writes that skip signals are not seen...
+        Bid.objects.filter(pk=bids[3].pk).update(amount=Decimal(99))
+        Bid.objects.create(event=self.event, participant=self.participant, amount=Decimal(50))
+        self.assertEqual(self.series()[0][1], '30.00')
+        self.assertEqual(self.series()[-1], ('50.00', '50.00', '50.00', '50.00', 1))
+
+        # ...while deleting a bid drops them.
+        bids[1].delete()
+        self.assertEqual(self.series()[0], ('10.00', '99.00', '5.00', '99.00', 3))
+
+    def test_bids_committing_after_their_bucket_was_cached_drop_it(self):
+        self.bid(10, minutes_ago=10)
+        self.assertEqual(self.series(), [('10.00', '10.00', '10.00', '10.00', 1)])
+
+        # A bid stamped ten minutes ago whose transaction only commits now.
+        stamped = timezone.now() - timedelta(minutes=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            with mock.patch('django.utils.timezone.now', return_value=stamped):
+                Bid.objects.create(event=self.event, participant=self.participant, amount=Decimal(20))
+        self.assertEqual(self.series()[0][1:], ('20.00', '10.00', '20.00', 2))
+
+
+
+class PermissionPolicyTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.other = User.objects.create_user('other', 'other@example.com', 'password')
+        seed_events(self.owner, 1)
+        self.event = Event.objects.get()
+        self.item = Item.objects.filter(event=self.event).first()
+        self.participant = Participant.objects.filter(event=self.event).first()
+
+    def test_only_owners_change_rows_of_their_events(self):
+        self.client.force_authenticate(self.other)
+        self.assertEqual(len(self.client.get('/api/items/').json()), 3)
+        self.assertEqual(self.client.patch(f'/api/items/{self.item.pk}/', {'quantity': 9}).status_code, 404)
+        item = {'event': self.event.pk, 'name': 'Sneaky', 'description': '-', 'quantity': 1}
+        self.assertEqual(self.client.post('/api/items/', item).status_code, 403)
+        self.assertEqual(self.client.patch(f'/api/events/{self.event.pk}/', {'name': 'Mine'}).status_code, 404)
+
+        # Anyone may bid, but only the owner may change bids.
+        response = self.client.post('/api/bids/', {'event': self.event.pk, 'participant': self.participant.pk, 'amount': '5'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.delete(f"/api/bids/{response.json()['id']}/").status_code, 404)
+
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.patch(f'/api/items/{self.item.pk}/', {'quantity': 9}).status_code, 200)
+
+    def test_personal_rows_are_only_readable_by_the_owner(self):
+        self.client.force_authenticate(self.other)
+        for url in ('/api/participants/', '/api/attachments/', '/api/logs/', '/api/awards/'):
+            self.assertEqual(self.client.get(url).json(), [], url)
+        self.assertEqual(self.client.get(f'/api/participants/{self.participant.pk}/').status_code, 404)
+
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(len(self.client.get('/api/participants/').json()), 3)
+
+    def test_event_details_and_changes_leave_personal_rows_out_for_others(self):
+        Participant.objects.create(event=self.event, name='Spy', contact_info='secret@corp.com')
+        EventLog.objects.create(event=self.event, message='internal note')
+        urls = [f'/api/events/{self.event.pk}/', f'/api/events/{self.event.pk}/changes/']
+
+        def bodies(user):
+            self.client.force_authenticate(user)
+            return [self.client.get(url).content.decode() for url in urls]
+
+        def assert_audiences():
+            for body in bodies(self.other):
+                self.assertNotIn('secret@corp.com', body)
+                self.assertNotIn('internal note', body)
+            for body in bodies(self.owner):
+                self.assertIn('secret@corp.com', body)
+                self.assertIn('internal note', body)
+
+        assert_audiences()
+        self.client.force_authenticate(self.other)
+        models = {change['model'] for change in self.client.get(urls[1]).json()['changes']}
+        self.assertIn('item', models)
+        self.assertFalse(models & {'participant', 'log', 'attachment', 'award'})
+
+        # Frozen events are answered from the snapshot of the caller's audience.
+        self.client.force_authenticate(self.owner)
+        self.client.post(f'/api/events/{self.event.pk}/stop/')
+        run_worker(processes=0, burst=True)
+        self.assertTrue(EventSnapshot.objects.filter(pk=self.event.pk).exists())
+        assert_audiences()
+
+    def test_cached_owned_event_ids(self):
+        with override_settings(OWNED_EVENTS={**settings.OWNED_EVENTS, 'CACHE_ENABLED': True}):
+            self.client.force_authenticate(self.owner)
+            self.assertEqual(self.client.patch(f'/api/items/{self.item.pk}/', {'quantity': 9}).status_code, 200)
+            with CaptureQueriesContext(connection) as context:
+                self.client.patch(f'/api/items/{self.item.pk}/', {'quantity': 8})
+            lookup = next(q['sql'] for q in context.captured_queries if q['sql'].startswith('SELECT'))
+            self.assertNotIn('JOIN', lookup)
+
+            # A new event is writable by its owner as soon as it is committed.
+            with self.captureOnCommitCallbacks(execute=True):
+                event = create_event(self.owner)
+            item = {'event': event.pk, 'name': 'New', 'description': '-', 'quantity': 1}
+            item_id = self.client.post('/api/items/', item).json()['id']
+            self.assertEqual(self.client.patch(f'/api/items/{item_id}/', {'quantity': 2}).status_code, 200)
+
+            self.client.force_authenticate(self.other)
+            self.assertEqual(self.client.patch(f'/api/items/{self.item.pk}/', {'quantity': 1}).status_code, 404)
+
+
+class CompressionTests(TestCase):
+    client_class = APIClient
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('owner', 'owner@example.com', 'password')
+        self.client.force_authenticate(self.owner)
+
+    def test_negotiation(self):
+        self.assertEqual(compression.negotiate('gzip, deflate', ['zstd', 'br', 'gzip']), 'gzip')
+        self.assertEqual(compression.negotiate('gzip;q=0, identity', ['gzip']), None)
+        self.assertEqual(compression.negotiate('*', ['nonexistent', 'gzip']), 'gzip')
+        self.assertEqual(compression.negotiate('', ['gzip']), None)
+
+    def test_large_responses_are_compressed_once(self):
+        seed_events(self.owner, 1, children=40)
+        url = f'/api/events/{Event.objects.get().pk}/'
+        plain = self.client.get(url)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        self.assertGreater(len(plain.content), settings.COMPRESSION['CACHE_MIN_SIZE'])
+        with mock.patch.object(compression, 'compress', wraps=compression.compress) as compress:
+            for _ in range(2):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+                self.assertEqual(response['Content-Encoding'], 'gzip')
+                self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(compress.call_count, 1)
+        self.assertLess(len(response.content), len(plain.content) / 4)
+
+        small = self.client.get('/api/jobs/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', small)
+
+    def test_streaming_responses_are_compressed_per_chunk(self):
+        chunks = [json.dumps({'row': n, 'pad': 'x' * 2000}).encode() for n in range(3)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks), content_type='application/json')
+        )
+        response = middleware(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        parts = list(response.streaming_content)
+        self.assertEqual(len(parts), len(chunks) + 1)
+        # Each block decodes on its own as soon as it arrives.
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.assertEqual(decoder.decompress(parts[0]), chunks[0])
+        self.assertEqual(gzip.decompress(b''.join(parts)), b''.join(chunks))
+
+
+class SyntheticDataTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_generated_events_have_their_rows_and_stats(self):
+        call_command('generate_synthetic_data', events=2, items=3, participants=4, bids=5, logs=2, stdout=StringIO())
+        self.assertEqual(Event.objects.filter(owner__username='synthetic').count(), 2)
+        for event in Event.objects.all():
+            self.assertEqual(event.items.count(), 3)
+            self.assertEqual(event.logs.count(), 2)
+            self.assertEqual(
+                (event.stats.bid_count, event.stats.participant_count, event.stats.item_count),
+                (5, 4, 3),
+            )
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': dict.fromkeys(settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']),
+    })
+    def test_api_benchmark_runs_every_scenario_and_finishes_jobs(self):
+        args = Namespace(events=2, items=2, participants=2, bids=3, logs=1, seed=0, requests=1, warmup=0, only=None)
+        _, results = api_benchmark.benchmark(args, stream=StringIO())
+        self.assertIn('events.export', results)
+        self.assertIn('bids.create', results)
+        self.assertTrue(all(result['requests'] == 1 for result in results.values()))
+        self.assertEqual(Job.objects.get(task='export_event').status, Job.SUCCEEDED)
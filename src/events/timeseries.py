@@ -0,0 +1,98 @@
+"""
+Bucketed bid history for charts.
+
+Each bucket carries the open, high, low and close bid amount and the number
+of bids, aggregated in one query with window functions over
+``Trunc('timestamp')``. Buckets that ended more than
+``BID_TIMESERIES['SETTLE']`` seconds ago cannot change except through an
+edit, a delete or a bid whose transaction took longer than that to commit,
+so they are cached per event and bucket size; a request only aggregates the
+newer bids, and the signals that watch bids drop the cache in those cases.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, F, Max, Min, Window
+from django.db.models.functions import FirstValue, RowNumber, Trunc
+from django.utils import timezone
+
+from eventManagementAPI.metrics import record_cache
+
+from .filters import truncate
+from .models import Bid
+
+BUCKETS = {'1m': 'minute', '1h': 'hour', '1d': 'day', '1w': 'week'}
+
+
+def _cache():
+    return caches[settings.BID_TIMESERIES['CACHE']]
+
+
+def _key(event_id, bucket):
+    return f'bid-timeseries:{event_id}:{bucket}'
+
+
+def _settled():
+    """Bids stamped before this are taken to be committed."""
+    return timezone.now() - timedelta(seconds=settings.BID_TIMESERIES['SETTLE'])
+
+
+def aggregate(event_id, kind, since=None):
+    """One row per ``kind`` bucket holding bids of the event, oldest first."""
+    bids = Bid.objects.filter(event_id=event_id)
+    if since is not None:
+        bids = bids.filter(timestamp__gte=since)
+    partition = {'partition_by': [F('start')]}
+    ascending = [F('timestamp').asc(), F('pk').asc()]
+    rows = (
+        bids.annotate(start=Trunc('timestamp', kind))
+        .annotate(
+            position=Window(RowNumber(), order_by=ascending, **partition),
+            open=Window(FirstValue('amount'), order_by=ascending, **partition),
+            close=Window(FirstValue('amount'), order_by=[F('timestamp').desc(), F('pk').desc()], **partition),
+            high=Window(Max('amount'), **partition),
+            low=Window(Min('amount'), **partition),
+            bids=Window(Count('pk'), **partition),
+        )
+        .filter(position=1)
+        .order_by('start')
+        .values_list('start', 'open', 'high', 'low', 'close', 'bids')
+    )
+    return [
+        {'start': start, 'open': open_, 'high': high, 'low': low, 'close': close, 'count': count}
+        for start, open_, high, low, close, count in rows
+    ]
+
+
+def bid_timeseries(event_id, bucket, serialize):
+    """
+    Return the event's ``bucket``-sized buckets (a key of ``BUCKETS``),
+    passed through ``serialize``. Settled buckets are cached already serialized.
+    """
+    kind = BUCKETS[bucket]
+    cache = _cache()
+    key = _key(event_id, bucket)
+    current = truncate(_settled(), kind)
+
+    cached = cache.get(key)
+    record_cache('bid_timeseries', cached is not None)
+    closed, through = cached or ([], None)
+    rows = aggregate(event_id, kind, since=through)
+    ended = [row for row in rows if row['start'] < current]
+    if ended:
+        closed = closed + list(serialize(ended))
+    if through != current:
+        cache.set(key, (closed, current), settings.BID_TIMESERIES['TTL'])
+    return closed + list(serialize(rows[len(ended):]))
+
+
+def invalidate(event_id):
+    """Forget the cached buckets of an event after one of its bids was edited or deleted."""
+    _cache().delete_many([_key(event_id, bucket) for bucket in BUCKETS])
+
+
+def bid_committed(bid):
+    """Called once a new bid commits; drops buckets that may have been cached without it."""
+    if bid.timestamp < _settled():
+        invalidate(bid.event_id)
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import EventViewSet, ItemViewSet, ParticipantViewSet, BidViewSet, ScenarioViewSet, AwardViewSet, AttachmentViewSet, TemplateViewSet, EventRuleViewSet, EventLogViewSet
+from .views import EventViewSet, ItemViewSet, ParticipantViewSet, BidViewSet, ScenarioViewSet, AwardViewSet, AttachmentViewSet, TemplateViewSet, EventRuleViewSet, EventLogViewSet, JobViewSet
 
 router = DefaultRouter()
 router.register(r'events', EventViewSet)
@@ -13,6 +13,7 @@ router.register(r'attachments', AttachmentViewSet)
 router.register(r'templates', TemplateViewSet)
 router.register(r'rules', EventRuleViewSet)
 router.register(r'logs', EventLogViewSet)
+router.register(r'jobs', JobViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,32 +1,189 @@
-from rest_framework import viewsets
+import gzip
+
+from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Event, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog
+from .models import Event, Item, Participant, Bid, Scenario, Award, Attachment, Template, EventRule, EventLog, Job, EventSnapshot
 from .serializers import (
     EventSerializer, ItemSerializer, ParticipantSerializer, BidSerializer, 
     ScenarioSerializer, AwardSerializer, AttachmentSerializer, 
-    TemplateSerializer, EventRuleSerializer, EventLogSerializer
+    TemplateSerializer, EventRuleSerializer, EventLogSerializer, CalendarQuerySerializer,
+    ChangesQuerySerializer, JobSerializer, EventCopySerializer, EventSummarySerializer,
+    TimeseriesQuerySerializer, BidBucketSerializer
+)
+from .permissions import (
+    OWNER_ONLY_RELATIONS, IsEventOwnerOrReadOnly, OwnerPolicy, PolicyMixin, forget_owned_events, is_event_owner,
 )
-from drf_yasg.utils import swagger_auto_schema
-from .permissions import IsEventOwnerOrReadOnly
+from .fast_serializers import FastListMixin
+from .search import FullTextSearchFilter
+from .filters import EventFilter, calendar_buckets
+from .journal import CursorExpired, changes_since, record_event_deleted
+from .jobs import enqueue
+from .cloning import clone_event, instantiate_template
+from .timeseries import bid_timeseries
+from .snapshots import fill_details, invalidate as invalidate_snapshot
 from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.reverse import reverse
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from eventManagementAPI.compression import etag_matches, negotiate
+from eventManagementAPI.idempotency import IdempotencyMixin
+from eventManagementAPI.schema import extend_schema
+from eventManagementAPI.throttling import BidEventThrottle, BidUserThrottle, ConcurrencyLimitMixin
 from .schema_extensions import (
     event_viewset_schema, item_viewset_schema, participant_viewset_schema, 
     bid_viewset_schema, scenario_viewset_schema, award_viewset_schema, 
     attachment_viewset_schema, template_viewset_schema, 
-    event_rule_viewset_schema, event_log_viewset_schema
+    event_rule_viewset_schema, event_log_viewset_schema, job_viewset_schema
 )
 
+def snapshot_response(request, gzipped, etag):
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+    elif negotiate(request.headers.get('Accept-Encoding', ''), ['gzip']):
+        response = HttpResponse(gzipped, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(gzipped), content_type='application/json')
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+    return response
+
+
+def copied_event(request, copy, *args, **kwargs):
+    """Run ``copy`` (see ``events.cloning``) and answer 201 with the new event."""
+    try:
+        event = copy(*args, **kwargs)
+    except ValueError as exc:
+        raise ValidationError(str(exc))
+    location = reverse('event-detail', args=[event.pk], request=request)
+    return Response(EventSummarySerializer(event).data, status=status.HTTP_201_CREATED, headers={'Location': location})
+
+
 @event_viewset_schema
-@swagger_auto_schema(tags=['Event'])
-class EventViewSet(viewsets.ModelViewSet):
-    queryset = Event.objects.all()
+@extend_schema(tags=['Event'])
+class EventViewSet(IdempotencyMixin, PolicyMixin, viewsets.ModelViewSet):
+    queryset = Event.objects.select_related('stats')
     serializer_class = EventSerializer
     permission_classes = [IsAuthenticated, IsEventOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['status', 'owner']
+    permission_policy = OwnerPolicy('owner')
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter]
+    filterset_class = EventFilter
+    # retrieve probes for a snapshot before the regular lookup.
+    query_budget = {'list': 8, 'retrieve': 9}
+    nested_relations = ['items', 'participants', 'bids', 'scenarios', 'attachments', 'rules', 'logs']
+
+    def retrieve(self, request, *args, **kwargs):
+        """Closed and canceled events are answered from their stored snapshot with one query."""
+        if isinstance(request.accepted_renderer, JSONRenderer) and str(kwargs.get('pk', '')).isdigit():
+            # The same filtering and permission checks as get_object, with the snapshot joined in.
+            queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+            event = (
+                queryset.filter(pk=kwargs['pk']).select_related('snapshot')
+                .defer('snapshot__export').first()
+            )
+            if event is not None and hasattr(event, 'snapshot'):
+                self.check_object_permissions(request, event)
+                snapshot = event.snapshot
+                if snapshot.base_url != request.build_absolute_uri('/'):
+                    snapshot = fill_details(event, request)
+                if is_event_owner(request, event):
+                    detail, etag = snapshot.owner_detail, snapshot.owner_etag
+                else:
+                    detail, etag = snapshot.public_detail, snapshot.public_etag
+                return snapshot_response(request, bytes(detail), etag)
+        return super().retrieve(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.prefetch_related(*self.nested_prefetches())
+        return queryset
+
+    def nested_prefetches(self):
+        """Rows only owners may read are fetched for the user's own events alone."""
+        condition = OwnerPolicy('event__owner').condition(self.request.user)
+        return [
+            Prefetch(name, queryset=OWNER_ONLY_RELATIONS[name].objects.filter(condition))
+            if name in OWNER_ONLY_RELATIONS else name
+            for name in self.nested_relations
+        ]
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        query = CalendarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        start, end, bucket = (query.validated_data[key] for key in ('start', 'end', 'bucket'))
+        buckets = calendar_buckets(self.filter_queryset(self.get_queryset()), start, end, bucket)
+        return Response({'start': start, 'end': end, 'bucket': bucket, 'buckets': buckets})
+
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        event = self.get_object()
+        query = ChangesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        try:
+            changes, cursor, has_more = changes_since(
+                event.pk, query.validated_data['since'], query.validated_data['limit'],
+                owner_view=is_event_owner(request, event),
+            )
+        except CursorExpired:
+            return Response({'error': 'Cursor has expired; resync the event from scratch.'}, status=status.HTTP_410_GONE)
+        return Response({'cursor': cursor, 'has_more': has_more, 'changes': changes})
+
+    @action(detail=True, methods=['get'], url_path='bids/timeseries', url_name='bid-timeseries')
+    def bid_timeseries(self, request, pk=None):
+        event = self.get_object()
+        query = TimeseriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        bucket = query.validated_data['bucket']
+        buckets = bid_timeseries(event.pk, bucket, lambda rows: BidBucketSerializer(rows, many=True).data)
+        return Response({'bucket': bucket, 'buckets': buckets})
+
+    def destroy(self, request, *args, **kwargs):
+        """
+        Hide the event now and purge its rows in a background job; deleting
+        through the ORM would load and signal every child row.
+        """
+        event = self.get_object()
+        with transaction.atomic():
+            Event.objects.filter(pk=event.pk).update(deleted_at=timezone.now())
+            transaction.on_commit(lambda: forget_owned_events(event.owner_id))
+            invalidate_snapshot(event.pk)
+            # QuerySet.update skips the signal that writes the tombstone.
+            record_event_deleted(event.pk)
+            job = enqueue('purge_event', owner=request.user, event_id=event.pk)
+        return self.accepted(job)
+
+    def accepted(self, job):
+        """Answer 202 with the queued job; clients poll its Location."""
+        location = reverse('job-detail', args=[job.pk], request=self.request)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+    @action(detail=True, methods=['post'])
+    def export(self, request, pk=None):
+        event = self.get_object()
+        return self.accepted(enqueue('export_event', owner=request.user, event_id=event.pk))
+
+    @action(detail=True, methods=['post'], url_path='compute-awards')
+    def compute_awards(self, request, pk=None):
+        event = self.get_object()
+        return self.accepted(enqueue('compute_awards', owner=request.user, event_id=event.pk))
+
+    @action(detail=True, methods=['post'])
+    def clone(self, request, pk=None):
+        source = self.get_object()
+        params = EventCopySerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        return copied_event(request, clone_event, source, request.user, **params.validated_data)
 
     @action(detail=True, methods=['post'])
     def publish(self, request, pk=None):
@@ -92,56 +249,100 @@ class EventViewSet(viewsets.ModelViewSet):
         return Response({'status': 'Event reopened'})
 
 @item_viewset_schema
-@swagger_auto_schema(tags=['Item'])
-class ItemViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['Item'])
+class ItemViewSet(PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Item.objects.all()
     serializer_class = ItemSerializer
+    permission_policy = OwnerPolicy('event__owner')
+    query_budget = {'list': 1, 'retrieve': 1}
+    filter_backends = [FullTextSearchFilter]
 
 @participant_viewset_schema
-@swagger_auto_schema(tags=['Participant'])
-class ParticipantViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['Participant'])
+class ParticipantViewSet(PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Participant.objects.all()
     serializer_class = ParticipantSerializer
+    permission_policy = OwnerPolicy('event__owner', scope_reads=True)
+    query_budget = {'list': 1, 'retrieve': 1}
+    filter_backends = [FullTextSearchFilter]
 
 @bid_viewset_schema
-@swagger_auto_schema(tags=['Bid'])
-class BidViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['Bid'])
+class BidViewSet(IdempotencyMixin, ConcurrencyLimitMixin, PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Bid.objects.all()
     serializer_class = BidSerializer
+    permission_policy = OwnerPolicy('event__owner', open_create=True)
+    query_budget = {'list': 1, 'retrieve': 1}
+    throttle_classes = [BidUserThrottle, BidEventThrottle]
+    concurrency_limit = settings.BID_CONCURRENCY_LIMIT
 
 @scenario_viewset_schema
-@swagger_auto_schema(tags=['Scenario'])
-class ScenarioViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['Scenario'])
+class ScenarioViewSet(PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Scenario.objects.all()
     serializer_class = ScenarioSerializer
+    permission_policy = OwnerPolicy('event__owner')
+    query_budget = {'list': 1, 'retrieve': 1}
 
 @award_viewset_schema
-@swagger_auto_schema(tags=['Award'])
-class AwardViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['Award'])
+class AwardViewSet(PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Award.objects.all()
     serializer_class = AwardSerializer
+    permission_policy = OwnerPolicy('scenario__event__owner', scope_reads=True)
+    query_budget = {'list': 1, 'retrieve': 1}
 
 @attachment_viewset_schema
-@swagger_auto_schema(tags=['Attachment'])
-class AttachmentViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['Attachment'])
+class AttachmentViewSet(PolicyMixin, viewsets.ModelViewSet):
     queryset = Attachment.objects.all()
     serializer_class = AttachmentSerializer
+    permission_policy = OwnerPolicy('event__owner', scope_reads=True)
+    query_budget = {'list': 1, 'retrieve': 1}
     parser_classes = [MultiPartParser]
 
 @template_viewset_schema
-@swagger_auto_schema(tags=['Template'])
-class TemplateViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['Template'])
+class TemplateViewSet(PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = Template.objects.all()
     serializer_class = TemplateSerializer
+    permission_policy = OwnerPolicy('event__owner', shared_when_unset=True)
+    query_budget = {'list': 1, 'retrieve': 1}
+
+    @action(detail=True, methods=['post'])
+    def instantiate(self, request, pk=None):
+        template = self.get_object()
+        params = EventCopySerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        if not isinstance(template.rules, dict):
+            raise ValidationError("Template rules must be an object mapping rule names to values.")
+        # Event.objects hides deleted events, so a template whose event was deleted starts empty.
+        source = Event.objects.filter(pk=template.event_id).first() if template.event_id else None
+        return copied_event(request, instantiate_template, template, source, request.user, **params.validated_data)
 
 @event_rule_viewset_schema
-@swagger_auto_schema(tags=['EventRule'])
-class EventRuleViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['EventRule'])
+class EventRuleViewSet(PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = EventRule.objects.all()
     serializer_class = EventRuleSerializer
+    permission_policy = OwnerPolicy('event__owner')
+    query_budget = {'list': 1, 'retrieve': 1}
 
 @event_log_viewset_schema
-@swagger_auto_schema(tags=['EventLog'])
-class EventLogViewSet(viewsets.ModelViewSet):
+@extend_schema(tags=['EventLog'])
+class EventLogViewSet(PolicyMixin, FastListMixin, viewsets.ModelViewSet):
     queryset = EventLog.objects.all()
     serializer_class = EventLogSerializer
+    permission_policy = OwnerPolicy('event__owner', scope_reads=True)
+    query_budget = {'list': 1, 'retrieve': 1}
+
+@job_viewset_schema
+@extend_schema(tags=['Job'])
+class JobViewSet(PolicyMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_policy = OwnerPolicy('owner', scope_reads=True)
+    query_budget = {'list': 1, 'retrieve': 1}
+
+    def get_queryset(self):
+        return super().get_queryset().order_by('-id')